@@ -0,0 +1,231 @@
+"""
+Agente de borda: roda apenas a captura/inferência (VideoCamera) junto da câmera
+e envia ao servidor central detecções, miniaturas e eventos de incidentes —
+nunca o vídeo. Sem interface web local.
+
+Uso:
+    python agent.py --central http://central:5000 --site obra-norte --token SEGREDO
+
+No servidor central, defina INGEST_TOKEN com o mesmo segredo (rota /api/ingest).
+
+A cada BATCH_INTERVAL o que foi coletado vira um lote JSON comprimido (gzip)
+e entra numa fila em disco (SQLite). Os lotes são enviados em ordem; se o link
+cair, ficam na fila (até QUEUE_MAX_BYTES, descartando os mais antigos) e são
+reenviados com backoff exponencial quando ele voltar.
+"""
+import argparse
+import base64
+import gzip
+import json
+import os
+import sqlite3
+import threading
+import time
+import urllib.error
+import urllib.request
+import zlib
+
+import cv2
+
+# === Configurações ===
+CENTRAL_URL = os.environ.get("CENTRAL_URL", "http://localhost:5000")
+SITE_ID = os.environ.get("SITE_ID", "site-01")
+INGEST_TOKEN = os.environ.get("INGEST_TOKEN", "")
+QUEUE_DB = "agent_queue.db"
+QUEUE_MAX_BYTES = 200 * 1024 * 1024 # Limite da fila em disco (lotes comprimidos)
+BATCH_INTERVAL = 5.0                # Segundos entre lotes
+MAX_FRAMES_PER_BATCH = 2000         # Keyframes com detecções por lote (excedente é descartado)
+THUMB_WIDTH = 320                   # Miniatura enviada com cada incidente novo
+THUMB_QUALITY = 60
+SEND_TIMEOUT = 15.0
+RETRY_MIN_DELAY = 2.0
+RETRY_MAX_DELAY = 120.0
+
+
+def default_camera_id(site):
+    """ID numérico estável da câmera do site na série temporal central."""
+    return zlib.crc32(site.encode("utf-8")) % 65000 + 2 # 1 = câmera local do central
+
+
+class DiskQueue:
+    """Fila FIFO de lotes em SQLite; sobrevive a quedas de rede e reinícios."""
+
+    def __init__(self, path=QUEUE_DB, max_bytes=QUEUE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""CREATE TABLE IF NOT EXISTS outbox (
+                                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                                created REAL,
+                                payload BLOB
+                             )""")
+        self.lock = threading.Lock()
+        self.bytes = self.conn.execute("SELECT COALESCE(SUM(LENGTH(payload)), 0) FROM outbox").fetchone()[0]
+        self.dropped = 0
+
+    def put(self, payload):
+        with self.lock:
+            self.conn.execute("INSERT INTO outbox (created, payload) VALUES (?, ?)", (time.time(), payload))
+            self.bytes += len(payload)
+            # Link fora por muito tempo: descarta os lotes mais antigos
+            while self.bytes > self.max_bytes:
+                row = self.conn.execute("SELECT id, LENGTH(payload) FROM outbox ORDER BY id LIMIT 1").fetchone()
+                if row is None:
+                    break
+                self.conn.execute("DELETE FROM outbox WHERE id = ?", (row[0],))
+                self.bytes -= row[1]
+                self.dropped += 1
+
+    def peek(self):
+        with self.lock:
+            return self.conn.execute("SELECT id, payload FROM outbox ORDER BY id LIMIT 1").fetchone()
+
+    def ack(self, item_id):
+        with self.lock:
+            row = self.conn.execute("SELECT LENGTH(payload) FROM outbox WHERE id = ?", (item_id,)).fetchone()
+            if row is not None:
+                self.conn.execute("DELETE FROM outbox WHERE id = ?", (item_id,))
+                self.bytes -= row[0]
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+
+
+class EdgeAgent:
+    """Coleta eventos da VideoCamera (listener) e envia lotes ao servidor central."""
+
+    def __init__(self, central=CENTRAL_URL, site=SITE_ID, token=INGEST_TOKEN,
+                 camera_id=None, queue=None, interval=BATCH_INTERVAL):
+        self.url = central.rstrip("/") + "/api/ingest"
+        self.site = site
+        self.token = token
+        self.camera_id = camera_id or default_camera_id(site)
+        self.queue = queue or DiskQueue()
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.frames = []
+        self.events = []
+        self.last_frame = None
+        self.seq = 0
+        self.retry_at = 0.0
+        self.failures = 0
+        self.stats = {"batches": 0, "sent": 0, "bytes_sent": 0, "send_errors": 0, "frames_dropped": 0}
+        self.stop = threading.Event()
+
+    # --- Coleta (thread de inferência da câmera) ---
+    def on_event(self, event, **data):
+        with self.lock:
+            if event == "detections":
+                self.last_frame = data["frame"]
+                if len(self.frames) >= MAX_FRAMES_PER_BATCH:
+                    self.stats["frames_dropped"] += 1
+                    return
+                self.frames.append({"ts": round(data["ts"], 3), "detections": [
+                    {"tag": d["tag"], "conf": round(float(d["conf"]), 3), "box": [int(v) for v in d["box"]],
+                     "coords": [round(float(c), 3) for c in d["coords"]], "track_id": d.get("track_id")}
+                    for d in data["detections"]]})
+            elif event == "incident_created":
+                self.events.append({"event": "created", "incident": data["incident"],
+                                    "thumbnail": self._thumbnail(self.last_frame)})
+            elif event == "incident_updated":
+                self.events.append(dict(data, event="updated"))
+
+    @staticmethod
+    def _thumbnail(frame):
+        if frame is None:
+            return None
+        h, w = frame.shape[:2]
+        if w > THUMB_WIDTH:
+            frame = cv2.resize(frame, (THUMB_WIDTH, int(h * THUMB_WIDTH / w)), interpolation=cv2.INTER_AREA)
+        ok, jpeg = cv2.imencode(".jpg", frame, [int(cv2.IMWRITE_JPEG_QUALITY), THUMB_QUALITY])
+        return base64.b64encode(jpeg.tobytes()).decode("ascii") if ok else None
+
+    # --- Envio ---
+    def seal(self):
+        """Fecha o lote atual (se houver algo) e o grava na fila em disco."""
+        with self.lock:
+            if not self.frames and not self.events:
+                return
+            frames, self.frames = self.frames, []
+            events, self.events = self.events, []
+        self.seq += 1
+        payload = {"site": self.site, "camera": self.camera_id, "seq": self.seq,
+                   "sent_at": time.time(), "detections": frames, "events": events}
+        self.queue.put(gzip.compress(json.dumps(payload, separators=(",", ":")).encode("utf-8")))
+        self.stats["batches"] += 1
+
+    def _post(self, body):
+        req = urllib.request.Request(self.url, data=body, method="POST", headers={
+            "Content-Type": "application/json",
+            "Content-Encoding": "gzip",
+            "X-Agent-Token": self.token,
+        })
+        with urllib.request.urlopen(req, timeout=SEND_TIMEOUT) as resp:
+            resp.read()
+
+    def drain(self):
+        """Envia a fila em ordem até esvaziar ou o link falhar."""
+        while not self.stop.is_set() and time.time() >= self.retry_at:
+            item = self.queue.peek()
+            if item is None:
+                return
+            item_id, body = item
+            try:
+                self._post(body)
+            except urllib.error.HTTPError as e:
+                if e.code in (400, 413, 422):
+                    # Lote rejeitado pelo central: reenviar não adianta
+                    print(f"[AGENTE] Lote {item_id} rejeitado (HTTP {e.code}); descartado.")
+                    self.queue.ack(item_id)
+                    continue
+                self._backoff(f"HTTP {e.code}")
+                return
+            except (urllib.error.URLError, OSError) as e:
+                self._backoff(e)
+                return
+            self.queue.ack(item_id)
+            self.failures = 0
+            self.stats["sent"] += 1
+            self.stats["bytes_sent"] += len(body)
+
+    def _backoff(self, reason):
+        self.failures += 1
+        self.stats["send_errors"] += 1
+        delay = min(RETRY_MAX_DELAY, RETRY_MIN_DELAY * 2 ** (self.failures - 1))
+        self.retry_at = time.time() + delay
+        print(f"[AGENTE] Falha no envio ({reason}). {len(self.queue)} lote(s) na fila; nova tentativa em {delay:.0f}s.")
+
+    def run(self):
+        while not self.stop.wait(self.interval):
+            self.seal()
+            self.drain()
+        self.seal() # Encerramento: o que falta fica na fila para a próxima execução
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--central", default=CENTRAL_URL, help="URL do servidor central")
+    parser.add_argument("--site", default=SITE_ID, help="Identificação do site")
+    parser.add_argument("--token", default=INGEST_TOKEN, help="Segredo compartilhado (INGEST_TOKEN do central)")
+    parser.add_argument("--camera-id", type=int, help="ID numérico da câmera no central (padrão: derivado do site)")
+    parser.add_argument("--queue", default=QUEUE_DB, help="Arquivo da fila em disco")
+    parser.add_argument("--interval", type=float, default=BATCH_INTERVAL)
+    args = parser.parse_args()
+
+    from camera import VideoCamera
+
+    agent = EdgeAgent(args.central, args.site, args.token, args.camera_id,
+                      DiskQueue(args.queue), args.interval)
+    VideoCamera().add_listener(agent.on_event)
+    print(f"Agente de borda '{args.site}' (câmera {agent.camera_id}) enviando para {agent.url}")
+    try:
+        agent.run()
+    except KeyboardInterrupt:
+        agent.stop.set()
+        agent.seal()
+        print("Agente encerrado.")
+
+
+if __name__ == "__main__":
+    main()
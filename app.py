@@ -1,7 +1,19 @@
-from flask import Flask, render_template, Response, jsonify, request
-from camera import VideoCamera
+from flask import Flask, Response, jsonify, request, stream_with_context, redirect
+from camera import VideoCamera, INFERENCE_SIZE
 from incidents_manager import incident_manager
+import incident_export
+from frontend_assets import FrontendAssets
+from detect_cache import DetectionCache, content_key, perceptual_key, NEAR_DUPLICATES
+import jpeg_codec
+from profiler import profiler, collapsed
+from rate_limit import rate_limit
+import ingest
+from detection_store import detection_store, records_as_dicts, rollups_as_dicts, RESOLUTIONS
 import os
+import hmac
+import json
+import sqlite3
+import zlib
 import time
 import datetime
 
@@ -12,12 +24,36 @@ app = Flask(__name__,
             template_folder='frontend/dist',
             static_url_path='/assets')
 
-# ... (Routes for static files)
+# /assets com variantes .br/.gz e cache imutável; index.html servido da memória
+frontend = FrontendAssets(app)
+
+# Incidentes resolvidos/antigos vão para o arquivo morto mensal em segundo plano
+incident_manager.start_archiver()
 
 # === API ENDPOINTS ===
+INCIDENT_FILTERS = ('status', 'tag', 'priority', 'start', 'end', 'q', 'active', 'archive')
+MAX_PAGE_SIZE = 500
+
 @app.route('/api/incidents', methods=['GET'])
 def get_incidents():
-    return jsonify(incident_manager.get_all())
+    """
+    Filtros opcionais: status, tag, priority, start, end (ISO), q (busca textual
+    e trecho do ID) e active=1 (só incidentes não encerrados).
+    Sem start/end lê só os incidentes recentes; archive=1, end ou start antigo
+    incluem o arquivo morto (ver IncidentManager._sources).
+    Paginação com limit/offset; o total vem no header X-Total-Count.
+    Sem limit, retorna todos os resultados (compatível com o frontend atual).
+    """
+    filters = {k: request.args.get(k) for k in INCIDENT_FILTERS}
+    limit = request.args.get('limit', type=int)
+    offset = max(0, request.args.get('offset', 0, type=int))
+    if limit is not None:
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    items, total = incident_manager.query_incidents(filters, limit, offset)
+    response = jsonify(items)
+    response.headers['X-Total-Count'] = str(total)
+    return response
 
 @app.route('/api/incidents', methods=['POST'])
 def create_incident():
@@ -39,6 +75,23 @@ def create_incident():
     )
     return jsonify(new_incident), 201
 
+@app.route('/api/incidents/export', methods=['GET'])
+def export_incidents():
+    """Exportação em streaming (csv, ndjson ou parquet) com os mesmos filtros da listagem."""
+    fmt = request.args.get('format', 'csv').lower()
+    if fmt not in incident_export.FORMATS:
+        return jsonify({"error": "Formato inválido (csv, ndjson, parquet)"}), 400
+    if fmt == 'parquet' and not incident_export.parquet_available():
+        return jsonify({"error": "Parquet indisponível (instale pyarrow)"}), 400
+
+    filters = {k: request.args.get(k) for k in INCIDENT_FILTERS}
+    rows = incident_manager.iter_incidents(filters)
+    mimetype, ext = incident_export.FORMATS[fmt]
+    filename = f"incidentes_{datetime.datetime.now():%Y%m%d_%H%M%S}.{ext}"
+    return Response(stream_with_context(incident_export.stream_export(fmt, rows)),
+                    mimetype=mimetype,
+                    headers={"Content-Disposition": f"attachment; filename={filename}"})
+
 @app.route('/api/incidents/<id>', methods=['PUT'])
 def update_incident(id):
     data = request.json
@@ -59,32 +112,9 @@ def add_note(id):
     if note: return jsonify(note), 201
     return jsonify({"error": "Not found"}), 404
 
-# === Security: Rate Limiter ===
-class Limiter:
-    def __init__(self):
-        self.requests = {}
-    
-    def is_allowed(self, ip):
-        now = time.time()
-        if ip not in self.requests:
-            self.requests[ip] = []
-        # Filter requests from last 60 seconds
-        self.requests[ip] = [t for t in self.requests[ip] if now - t < 60]
-        
-        if len(self.requests[ip]) >= 5: # Limit: 5 per minute
-            return False
-            
-        self.requests[ip].append(now)
-        return True
-
-limiter = Limiter()
-
 @app.route('/api/login', methods=['POST'])
+@rate_limit(5, per=60, scope='login', message="Muitas tentativas. Aguarde 1 minuto.")
 def login():
-    # Rate Limiting Check
-    if not limiter.is_allowed(request.remote_addr):
-        return jsonify({"success": False, "message": "Muitas tentativas. Aguarde 1 minuto."}), 429
-
     data = request.json
     username = data.get('username')
     password = data.get('password')
@@ -101,6 +131,84 @@ def login():
         })
     return jsonify({"success": False, "message": "Credenciais inválidas"}), 401
 
+# === Modo agente: ingestão de lotes dos sites (agent.py) ===
+# Sem INGEST_TOKEN no ambiente, a rota fica desligada (404)
+INGEST_TOKEN = os.environ.get('INGEST_TOKEN')
+MAX_INGEST_BYTES = 16 * 1024 * 1024 # Tamanho máximo do lote (recebido e descomprimido)
+
+@app.route('/api/ingest', methods=['POST'])
+def ingest_batch():
+    if not INGEST_TOKEN:
+        return jsonify({"error": "Not found"}), 404
+    if not hmac.compare_digest(request.headers.get('X-Agent-Token', '').encode(), INGEST_TOKEN.encode()):
+        return jsonify({"error": "Não autorizado"}), 401
+
+    # Limita o corpo antes de ler/descomprimir (o gzip só pode encolher o lote)
+    if request.content_length is not None and request.content_length > MAX_INGEST_BYTES:
+        return jsonify({"error": "Lote muito grande"}), 413
+    body = request.stream.read(MAX_INGEST_BYTES + 1)
+    if len(body) > MAX_INGEST_BYTES:
+        return jsonify({"error": "Lote muito grande"}), 413
+    if request.headers.get('Content-Encoding') == 'gzip':
+        # Limita a descompressão (proteção contra "zip bomb")
+        inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        try:
+            body = inflater.decompress(body, MAX_INGEST_BYTES)
+        except zlib.error:
+            return jsonify({"error": "gzip inválido"}), 400
+        if inflater.unconsumed_tail:
+            return jsonify({"error": "Lote muito grande"}), 413
+    try:
+        counts = ingest.apply_batch(json.loads(body), app.static_folder)
+    except (ValueError, KeyError, TypeError, OverflowError,
+            sqlite3.IntegrityError, sqlite3.InterfaceError, sqlite3.ProgrammingError) as e:
+        # 400: o agente descarta o lote em vez de reenviá-lo para sempre
+        return jsonify({"error": f"Lote inválido: {e}"}), 400
+    except sqlite3.Error as e:
+        # Banco travado/indisponível: transitório, o agente tenta de novo
+        return jsonify({"error": f"Falha ao gravar o lote: {e}"}), 503
+    return jsonify({"success": True, **counts})
+
+# === Admin: profiler por amostragem ===
+# Sem ADMIN_TOKEN no ambiente, as rotas de admin ficam desligadas (404)
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+
+def _is_admin():
+    token = request.headers.get('X-Admin-Token', '')
+    if not token and request.headers.get('Authorization', '').startswith('Bearer '):
+        token = request.headers['Authorization'][7:]
+    return hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode())
+
+@app.route('/api/admin/profile', methods=['GET'])
+def profile():
+    """
+    Amostra as pilhas de todas as threads por ?seconds=N (padrão 5).
+    format=collapsed (padrão, para flamegraph.pl/speedscope) ou json
+    (CPU por thread + pilhas mais frequentes). lines=1 separa por linha.
+    """
+    if not ADMIN_TOKEN:
+        return jsonify({"error": "Not found"}), 404
+    if not _is_admin():
+        return jsonify({"error": "Não autorizado"}), 401
+
+    fmt = request.args.get('format', 'collapsed')
+    if fmt not in ('collapsed', 'json'):
+        return jsonify({"error": "Formato inválido (collapsed, json)"}), 400
+    try:
+        result = profiler.profile(request.args.get('seconds', 5.0, type=float),
+                                  request.args.get('interval', 0.01, type=float),
+                                  lines=request.args.get('lines') == '1')
+    except RuntimeError as e:
+        return jsonify({"error": str(e)}), 409
+
+    if fmt == 'json':
+        stacks = [{"stack": s, "count": c} for s, c in result.pop('stacks').most_common(200)]
+        return jsonify(dict(result, stacks=stacks))
+    filename = f"profile_{datetime.datetime.now():%Y%m%d_%H%M%S}.folded"
+    return Response(collapsed(result['stacks']), mimetype='text/plain',
+                    headers={"Content-Disposition": f"attachment; filename={filename}",
+                             "X-Profile-Samples": str(result['samples'])})
+
 # === Security: Headers ===
 @app.after_request
 def add_security_headers(response):
@@ -111,64 +219,64 @@ def add_security_headers(response):
 
 @app.route('/api/stats', methods=['GET'])
 def get_stats():
-    # Helper Stats from DB
+    # Contagens agregadas no SQL (não carrega os incidentes nem o arquivo morto inteiro)
     stats = incident_manager.get_stats()
-    
-    # We need to construct the breakdown and activity data here or in manager.
-    # Manager returns basic counts. Let's do it properly.
-    # Actually, incident_manager.get_stats() provided currently returns:
-    # { dailyFireCount, monthlyFireCount, total }
-    # But frontend needs 'statusBreakdown' and 'activityData'.
-    # So we need to fetch all and build the rest, OR update manager.
-    # Let's fetch all fixes it faster without changing manager again.
-    
-    incidents = incident_manager.get_all()
-    
-    # 1. Counts
-    today = datetime.datetime.now().date()
-    current_month = datetime.datetime.now().month
-    
-    daily_count = sum(1 for i in incidents if datetime.datetime.fromisoformat(i['timestamp']).date() == today and i['tag'] == 'FOGO')
-    monthly_count = sum(1 for i in incidents if datetime.datetime.fromisoformat(i['timestamp']).month == current_month and i['tag'] == 'FOGO')
-    
-    # 2. Status Breakdown
-    status_counts = {}
-    for i in incidents:
-        status_counts[i['status']] = status_counts.get(i['status'], 0) + 1
-        
+    status_counts = stats['statusCounts']
+
     status_breakdown = [
         { "name": "Novo", "value": status_counts.get("Novo", 0), "color": "#ef4444" },
         { "name": "Em Andamento", "value": status_counts.get("Em Andamento", 0), "color": "#f59e0b" },
         { "name": "Resolvido", "value": status_counts.get("Resolvido", 0), "color": "#10b981" },
         { "name": "Outros", "value": status_counts.get("Outros", 0), "color": "#64748b" }
     ]
-    
-    # 3. Hourly Activity (Last 24h)
-    activity_data = []
-    
-    # Initialize 24h buckets for today
-    buckets = {h: 0 for h in range(24)}
-    
-    for i in incidents:
-        dt = datetime.datetime.fromisoformat(i['timestamp'])
-        # Only count today's incidents for the hourly chart
-        if dt.date() == today:
-            buckets[dt.hour] += 1
-            
-    # Format for Recharts
-    for h in range(0, 24, 4): # Every 4 hours to keep chart clean
-        # Sum the interval
-        count = sum(buckets[x] for x in range(h, h+4) if x < 24)
-        label = f"{h:02d}h"
-        activity_data.append({"name": label, "fires": count})
+
+    # Hourly Activity (today), every 4 hours to keep chart clean
+    hourly = stats['hourly']
+    activity_data = [{"name": f"{h:02d}h", "fires": sum(hourly[h:h+4])} for h in range(0, 24, 4)]
 
     return jsonify({
-        "dailyFireCount": daily_count,
-        "monthlyFireCount": monthly_count,
+        "dailyFireCount": stats['dailyFireCount'],
+        "monthlyFireCount": stats['monthlyFireCount'],
         "statusBreakdown": status_breakdown,
         "activityData": activity_data
     })
 
+MAX_RAW_DETECTIONS = 10000
+
+def _parse_time(value, default):
+    """Epoch em segundos ou ISO 8601 (horário local, como os incidentes)."""
+    if not value:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.datetime.fromisoformat(value).timestamp()
+
+@app.route('/api/detections/series', methods=['GET'])
+def detection_series():
+    """
+    Série temporal das detecções (armazenada fora do incidents.db).
+    resolution: minute, hour ou raw (últimos MAX_RAW_DETECTIONS registros).
+    Padrão: últimas 24h agregadas por hora. Filtros opcionais: tag, camera.
+    """
+    try:
+        end = _parse_time(request.args.get('end'), time.time())
+        start = _parse_time(request.args.get('start'), end - 86400)
+    except ValueError:
+        return jsonify({"error": "Data inválida (use epoch ou ISO 8601)"}), 400
+
+    resolution = request.args.get('resolution', 'hour')
+    tag = request.args.get('tag')
+    camera = request.args.get('camera', type=int)
+    if resolution == 'raw':
+        series = records_as_dicts(detection_store.query(start, end, tag, camera)[-MAX_RAW_DETECTIONS:])
+    elif resolution in RESOLUTIONS:
+        series = rollups_as_dicts(detection_store.rollup(start, end, resolution, tag, camera))
+    else:
+        return jsonify({"error": "Resolução inválida (minute, hour, raw)"}), 400
+
+    return jsonify({"resolution": resolution, "start": start, "end": end, "series": series})
+
 @app.route('/api/snapshot', methods=['POST'])
 def snapshot():
     camera = VideoCamera()
@@ -180,44 +288,85 @@ def snapshot():
         return jsonify({"url": f"/assets/{filename}", "success": True})
     return jsonify({"error": "Camera not ready"}), 503
 
+detect_cache = DetectionCache()
+
 @app.route('/api/detect', methods=['POST'])
+@rate_limit(60, per=60, burst=10, scope='detect', message="Limite de inferências atingido. Tente novamente em instantes.")
 def detect_external():
     """Recebe uma imagem (blob) e retorna detecções."""
     if 'image' not in request.files:
         return jsonify({"error": "No image"}), 400
     
-    file = request.files['image']
-    import numpy as np
-    import cv2
-    
-    # Decode image securely
-    npimg = np.fromfile(file, np.uint8)
-    frame = cv2.imdecode(npimg, cv2.IMREAD_COLOR)
+    data = request.files['image'].read()
+    camera = VideoCamera()
+
+    # Cache: resultado vale enquanto modelo/homografia não mudarem
+    camera.refresh_homography()
+    detect_cache.check_generation(camera.detector_version)
+    key = content_key(data)
+    detections = detect_cache.get(key)
+    if detections is not None:
+        return _detect_response(detections, "HIT")
+
+    # Decode image securely (JPEG grande: decodificação reduzida para o tamanho da inferência)
+    frame, scale = jpeg_codec.decode(data, INFERENCE_SIZE)
     
     if frame is None:
         return jsonify({"error": "Invalid image"}), 400
 
+    # Quase-duplicata (ex: mesmo frame recomprimido pelo celular), só se pedida.
+    # Não é gravada sob a chave exata: o resultado reaproveitado não ganha vida nova.
+    phash = perceptual_key(frame, scale)
+    near = NEAR_DUPLICATES or request.values.get('near') in ('1', 'true')
+    detections = detect_cache.get_similar(phash if near else None) # None: só conta o miss
+    if detections is not None:
+        return _detect_response(detections, "NEAR")
+
     # Run Inference (Shared Logic)
-    detections = VideoCamera().process_frame(frame)
+    detections = camera.process_frame(frame, src_scale=scale)
+    detect_cache.put(key, detections, phash)
     
-    return jsonify({"success": True, "detections": detections})
+    return _detect_response(detections, "MISS")
+
+def _detect_response(detections, cache_status):
+    response = jsonify({"success": True, "detections": detections})
+    response.headers['X-Cache'] = cache_status
+    return response
+
+@app.route('/api/detect/cache', methods=['GET'])
+def detect_cache_metrics():
+    return jsonify(detect_cache.metrics())
+
+@app.route('/api/inference/metrics', methods=['GET'])
+def inference_metrics():
+    """Estado e decisões do controlador adaptativo da inferência."""
+    return jsonify(VideoCamera().controller.metrics())
 
 # ... (Original Routes)
 def gen(camera):
+    last = None
     while True:
         frame = camera.get_frame()
-        if frame is None:
+        if frame is None or frame is last:
+            # Mesmo JPEG do cache compartilhado: espera um frame novo
+            time.sleep(0.01)
             continue
+        last = frame
         yield (b'--frame\r\n'
                b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n')
 
 @app.route('/')
 def index():
-    return render_template('index.html')
+    return frontend.index()
+
+# Porta do stream_server.py (asyncio); se definida, o MJPEG é servido por ele
+STREAM_PORT = os.environ.get('STREAM_PORT')
 
 @app.route('/video_feed')
 def video_feed():
-# ...
+    if STREAM_PORT:
+        # Não prende uma thread do Flask por espectador
+        return redirect(f"{request.scheme}://{request.host.split(':')[0]}:{STREAM_PORT}/video_feed")
     try:
         return Response(gen(VideoCamera()),
                         mimetype='multipart/x-mixed-replace; boundary=frame')
@@ -230,7 +379,7 @@ def catch_all(path):
     # Pass unrelated requests to index.html so React Router handles them
     # Exception: if it puts /video_feed here it might be an issue if defined after? 
     # Actually explicit routes take precedence.
-    return render_template('index.html')
+    return frontend.index()
 
 if __name__ == '__main__':
     # Debug=False para melhor performance e evitar reloads
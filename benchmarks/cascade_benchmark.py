@@ -0,0 +1,124 @@
+"""
+Benchmark da cascata (pré-filtro de cor/cintilação + YOLO) contra a inferência
+sempre ligada, em clipes gravados.
+
+Uso:
+    python benchmarks/cascade_benchmark.py clipe1.mp4 clipe2.mp4 [--crop] [--source 0]
+
+Para cada keyframe o YOLO roda no frame inteiro (referência) e o resultado é
+comparado com o da cascata. Relata CPU gasta em cada modo e o recall da
+cascata em relação à referência (por frame e por caixa), em JSON.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+from camera import VideoCamera, FirePrefilter, KEYFRAME_INTERVAL
+from tracker import iou_matrix
+
+IOU_MATCH = 0.3
+
+
+def make_detector():
+    """VideoCamera sem threads/captura: só modelo (o singleton abriria a câmera)."""
+    detector = object.__new__(VideoCamera)
+    detector._load_model()
+    detector.homography_matrix = None
+    if detector.model is None:
+        sys.exit("Modelo YOLO indisponível (MODEL_PATH).")
+    return detector
+
+
+def matched_boxes(reference, candidate):
+    """Quantas caixas da referência têm correspondente (mesma tag, IoU) na cascata."""
+    found = 0
+    for tag in {d["tag"] for d in reference}:
+        ref = [d["box"] for d in reference if d["tag"] == tag]
+        cand = [d["box"] for d in candidate if d["tag"] == tag]
+        if not cand:
+            continue
+        found += int((iou_matrix(ref, cand) >= IOU_MATCH).any(axis=1).sum())
+    return found
+
+
+def run_clip(path, detector, source, crop, keyframe_interval):
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise RuntimeError(f"Não foi possível abrir {path}")
+
+    prefilter = FirePrefilter(source)
+    r = {
+        "clip": path, "keyframes": 0, "yolo_runs": 0,
+        "cpu_baseline_s": 0.0, "cpu_cascade_s": 0.0,
+        "frames_with_fire": 0, "frames_recalled": 0,
+        "boxes_reference": 0, "boxes_recalled": 0
+    }
+    index = 0
+    while True:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        index += 1
+        if (index - 1) % keyframe_interval:
+            continue
+        if frame.shape[0] > 480:
+            frame = cv2.resize(frame, (640, 480))
+        r["keyframes"] += 1
+
+        t0 = time.process_time()
+        reference = detector.process_frame(frame)
+        r["cpu_baseline_s"] += time.process_time() - t0
+
+        t0 = time.process_time()
+        run, roi = prefilter.gate(frame, crop=crop)
+        cascade = detector.process_frame(frame, roi) if run else []
+        r["cpu_cascade_s"] += time.process_time() - t0
+        r["yolo_runs"] += int(run)
+
+        if reference:
+            r["frames_with_fire"] += 1
+            r["frames_recalled"] += int(bool(cascade))
+            r["boxes_reference"] += len(reference)
+            r["boxes_recalled"] += matched_boxes(reference, cascade)
+    cap.release()
+    return r
+
+
+def summarize(results):
+    total = {k: sum(r[k] for r in results) for k in results[0] if k != "clip"}
+    base = total["cpu_baseline_s"]
+    total["cpu_saved_pct"] = round(100.0 * (1 - total["cpu_cascade_s"] / base), 2) if base else 0.0
+    total["frame_recall"] = round(total["frames_recalled"] / total["frames_with_fire"], 4) if total["frames_with_fire"] else None
+    total["box_recall"] = round(total["boxes_recalled"] / total["boxes_reference"], 4) if total["boxes_reference"] else None
+    total["yolo_run_ratio"] = round(total["yolo_runs"] / total["keyframes"], 4) if total["keyframes"] else None
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("clips", nargs="+", help="Arquivos de vídeo gravados")
+    parser.add_argument("--source", default=None, help="Chave de PREFILTER_OVERRIDES (ajuste por câmera)")
+    parser.add_argument("--crop", action="store_true", help="YOLO apenas no recorte das candidatas")
+    parser.add_argument("--keyframe-interval", type=int, default=KEYFRAME_INTERVAL)
+    parser.add_argument("--output", help="Salva o JSON neste arquivo")
+    args = parser.parse_args()
+
+    source = int(args.source) if args.source is not None and args.source.isdigit() else args.source
+    detector = make_detector()
+    results = [run_clip(c, detector, source, args.crop, args.keyframe_interval) for c in args.clips]
+    report = {"clips": results, "total": summarize(results), "crop": args.crop}
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
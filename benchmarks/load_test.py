@@ -0,0 +1,303 @@
+"""
+Driver de carga que reproduz o padrão de polling real do frontend.
+
+Uso (sobe o stub server sozinho e mede o processo dele):
+    python benchmarks/load_test.py --spawn --db bench_100k.db --duration 60 \\
+        --pollers 20 --dashboards 5 --viewers 10 --output resultado.json
+
+Ou contra um servidor já rodando (informe o PID para medir CPU/RSS):
+    python benchmarks/load_test.py --url http://127.0.0.1:5050 --server-pid 1234
+
+Mistura simulada:
+  * pollers:    página de Incidentes, GET /api/incidents?limit=200 a cada 3s
+  * dashboards: carga do Dashboard/Analytics, GET /api/stats a cada --dashboard-interval
+  * viewers:    clientes MJPEG em /video_feed (quadros/s e tempo até o 1º quadro)
+  * detectors:  POST /api/detect com --detect-image, em loop fechado
+
+Saída em JSON: p50/p90/p99, vazão e erros por rota; CPU média e RSS máximo do
+servidor (processo + filhos, ex: workers do gunicorn).
+"""
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+import uuid
+
+POLL_INTERVAL = 3.0 # Igual ao setInterval da página de Incidentes
+
+
+class Recorder:
+    """Latências por rota (thread-safe)."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = {}
+        self.errors = {}
+
+    def add(self, route, seconds, ok):
+        with self.lock:
+            if ok:
+                self.samples.setdefault(route, []).append(seconds)
+            else:
+                self.errors[route] = self.errors.get(route, 0) + 1
+
+    def report(self, duration):
+        out = {}
+        for route in set(self.samples) | set(self.errors):
+            lat = sorted(self.samples.get(route, []))
+            out[route] = {
+                "requests": len(lat),
+                "errors": self.errors.get(route, 0),
+                "throughput_rps": round(len(lat) / duration, 2),
+                "p50_ms": _pct(lat, 50), "p90_ms": _pct(lat, 90), "p99_ms": _pct(lat, 99),
+                "max_ms": round(lat[-1] * 1000, 2) if lat else None,
+            }
+        return out
+
+
+def _pct(sorted_values, p):
+    if not sorted_values:
+        return None
+    k = min(len(sorted_values) - 1, int(round(p / 100.0 * (len(sorted_values) - 1))))
+    return round(sorted_values[k] * 1000, 2)
+
+
+def _connection(url, timeout=30):
+    parts = urllib.parse.urlsplit(url)
+    return http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=timeout)
+
+
+def _request(conn, method, path, body=None, headers=None):
+    conn.request(method, path, body=body, headers=headers or {})
+    resp = conn.getresponse()
+    resp.read()
+    return resp.status
+
+
+def request_loop(url, route, path, interval, stop, rec, method="GET", body=None, headers=None):
+    """Cliente com conexão keep-alive; interval=0 é loop fechado."""
+    conn = _connection(url)
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            status = _request(conn, method, path, body, headers)
+            rec.add(route, time.perf_counter() - start, status < 500 and status != 429)
+        except (OSError, http.client.HTTPException):
+            rec.add(route, time.perf_counter() - start, False)
+            conn.close()
+            conn = _connection(url)
+        if interval:
+            stop.wait(max(0.0, interval - (time.perf_counter() - start)))
+    conn.close()
+
+
+def mjpeg_viewer(url, stop, results):
+    """Consome /video_feed contando quadros (boundary 'frame')."""
+    r = {"frames": 0, "first_frame_ms": None, "bytes": 0, "error": None}
+    conn = _connection(url, timeout=10)
+    start = time.perf_counter()
+    try:
+        conn.request("GET", "/video_feed")
+        resp = conn.getresponse()
+        tail = b""
+        while not stop.is_set():
+            chunk = resp.read1(65536) if hasattr(resp, "read1") else resp.read(65536)
+            if not chunk:
+                break
+            r["bytes"] += len(chunk)
+            data = tail + chunk
+            found = data.count(b"--frame")
+            if found and r["first_frame_ms"] is None:
+                r["first_frame_ms"] = round((time.perf_counter() - start) * 1000, 2)
+            r["frames"] += found
+            tail = data[-6:] # Menor que "--frame": não recontar
+    except (OSError, http.client.HTTPException) as e:
+        r["error"] = str(e)
+    finally:
+        conn.close()
+    r["seconds"] = time.perf_counter() - start
+    results.append(r)
+
+
+def _descendants(pid):
+    """PIDs do processo e filhos (Linux /proc)."""
+    parents = {}
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    fields = f.read().rsplit(")", 1)[1].split()
+                parents.setdefault(int(fields[1]), []).append(int(entry))
+            except OSError:
+                continue
+    found, stack = [], [pid]
+    while stack:
+        p = stack.pop()
+        found.append(p)
+        stack.extend(parents.get(p, []))
+    return found
+
+
+def _proc_usage(pid):
+    """(segundos de CPU, RSS em bytes) do processo e filhos."""
+    try:
+        import psutil
+        procs = [psutil.Process(pid)] + psutil.Process(pid).children(recursive=True)
+        cpu = sum(sum(p.cpu_times()[:2]) for p in procs)
+        return cpu, sum(p.memory_info().rss for p in procs)
+    except ImportError:
+        pass
+    tick = os.sysconf("SC_CLK_TCK")
+    cpu, rss = 0.0, 0
+    for p in _descendants(pid):
+        try:
+            with open(f"/proc/{p}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            cpu += (int(fields[11]) + int(fields[12])) / tick
+            with open(f"/proc/{p}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        rss += int(line.split()[1]) * 1024
+        except OSError:
+            continue
+    return cpu, rss
+
+
+def sample_server(pid, stop, out, interval=1.0):
+    cpu0, rss = _proc_usage(pid)
+    t0 = time.perf_counter()
+    out["rss_max_mb"] = rss / 1e6
+    while not stop.wait(interval):
+        _, rss = _proc_usage(pid)
+        out["rss_max_mb"] = max(out["rss_max_mb"], rss / 1e6)
+    cpu1, rss = _proc_usage(pid)
+    out["cpu_seconds"] = round(cpu1 - cpu0, 2)
+    out["cpu_avg_pct"] = round(100.0 * (cpu1 - cpu0) / (time.perf_counter() - t0), 1)
+    out["rss_end_mb"] = round(rss / 1e6, 1)
+    out["rss_max_mb"] = round(out["rss_max_mb"], 1)
+
+
+def _multipart_image(path):
+    boundary = uuid.uuid4().hex
+    with open(path, "rb") as f:
+        data = f.read()
+    body = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"image\"; filename=\"frame.jpg\"\r\n"
+            f"Content-Type: image/jpeg\r\n\r\n").encode() + data + f"\r\n--{boundary}--\r\n".encode()
+    return body, {"Content-Type": f"multipart/form-data; boundary={boundary}"}
+
+
+def wait_ready(url, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = _connection(url, timeout=2)
+            if _request(conn, "GET", "/api/incidents?limit=1") == 200:
+                return True
+        except (OSError, http.client.HTTPException):
+            pass
+        time.sleep(0.5)
+    return False
+
+
+def run(args):
+    server = None
+    pid = args.server_pid
+    if args.spawn:
+        stub = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stub_server.py")
+        port = urllib.parse.urlsplit(args.url).port or 80
+        cmd = [sys.executable, stub, "--port", str(port)] + (["--db", args.db] if args.db else [])
+        server = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        pid = server.pid
+    try:
+        if not wait_ready(args.url):
+            sys.exit(f"Servidor não respondeu em {args.url}")
+
+        stop = threading.Event()
+        rec = Recorder()
+        viewers = []
+        threads = []
+        for _ in range(args.pollers):
+            threads.append(threading.Thread(target=request_loop, args=(
+                args.url, "GET /api/incidents", "/api/incidents?limit=200", POLL_INTERVAL, stop, rec)))
+        for _ in range(args.dashboards):
+            threads.append(threading.Thread(target=request_loop, args=(
+                args.url, "GET /api/stats", "/api/stats", args.dashboard_interval, stop, rec)))
+        for _ in range(args.viewers):
+            threads.append(threading.Thread(target=mjpeg_viewer, args=(args.url, stop, viewers)))
+        if args.detect_image:
+            body, headers = _multipart_image(args.detect_image)
+            for _ in range(args.detectors):
+                threads.append(threading.Thread(target=request_loop, args=(
+                    args.url, "POST /api/detect", "/api/detect", 0, stop, rec, "POST", body, headers)))
+
+        server_stats = {}
+        sampler = None
+        if pid:
+            sampler = threading.Thread(target=sample_server, args=(pid, stop, server_stats))
+            sampler.start()
+
+        for t in threads:
+            t.daemon = True
+            t.start()
+        start = time.perf_counter()
+        time.sleep(args.duration)
+        stop.set()
+        for t in threads:
+            t.join(timeout=10)
+        if sampler:
+            sampler.join()
+        duration = time.perf_counter() - start
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+    fps = sorted(v["frames"] / v["seconds"] for v in viewers if v["seconds"])
+    first = sorted(v["first_frame_ms"] for v in viewers if v["first_frame_ms"] is not None)
+    return {
+        "config": {k: v for k, v in vars(args).items()},
+        "duration_s": round(duration, 2),
+        "routes": rec.report(duration),
+        "video_feed": {
+            "viewers": args.viewers,
+            "errors": sum(1 for v in viewers if v["error"]),
+            "fps_p50": round(fps[len(fps) // 2], 2) if fps else None,
+            "fps_min": round(fps[0], 2) if fps else None,
+            "first_frame_p50_ms": first[len(first) // 2] if first else None,
+            "first_frame_max_ms": first[-1] if first else None,
+            "mbytes_total": round(sum(v["bytes"] for v in viewers) / 1e6, 2),
+        },
+        "server": server_stats,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:5050")
+    parser.add_argument("--spawn", action="store_true", help="Sobe benchmarks/stub_server.py automaticamente")
+    parser.add_argument("--db", help="Banco usado pelo servidor com --spawn")
+    parser.add_argument("--server-pid", type=int, help="PID do servidor para medir CPU/RSS")
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--pollers", type=int, default=10)
+    parser.add_argument("--dashboards", type=int, default=2)
+    parser.add_argument("--dashboard-interval", type=float, default=30.0)
+    parser.add_argument("--viewers", type=int, default=5)
+    parser.add_argument("--detect-image", help="JPEG enviado ao /api/detect (desligado se omitido)")
+    parser.add_argument("--detectors", type=int, default=2)
+    parser.add_argument("--output", help="Salva o JSON neste arquivo")
+    args = parser.parse_args()
+
+    text = json.dumps(run(args), indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Sobe o app Flask com uma câmera falsa (sem webcam/YOLO) para testes de carga.
+
+Uso:
+    python benchmarks/stub_server.py --db bench_100k.db --port 5050
+    # ou com gunicorn (a partir da raiz do projeto):
+    INCIDENTS_DB=bench_100k.db gunicorn -w 4 --threads 8 -b :5050 benchmarks.stub_server:app
+
+A câmera falsa entrega JPEGs 640x480 fixos a STUB_FPS quadros/s e simula o
+custo de inferência do /api/detect com um sleep de STUB_DETECT_MS.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+import types
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+STUB_FPS = float(os.environ.get("STUB_FPS", "25"))
+STUB_DETECT_MS = float(os.environ.get("STUB_DETECT_MS", "30"))
+
+
+def _make_jpeg(seed=0):
+    try:
+        import cv2
+        import numpy as np
+        frame = np.random.default_rng(seed).integers(0, 255, (480, 640, 3), dtype=np.uint8)
+        frame = cv2.GaussianBlur(frame, (9, 9), 0) # Ruído suavizado ~ tamanho de um frame real
+        ok, jpeg = cv2.imencode('.jpg', frame, [int(cv2.IMWRITE_JPEG_QUALITY), 60])
+        return jpeg.tobytes()
+    except ImportError:
+        # Sem OpenCV: bytes com tamanho típico de um frame (não decodificável)
+        return b"\xff\xd8" + os.urandom(30000) + b"\xff\xd9"
+
+
+class _StubController:
+    def metrics(self):
+        return {"level": 0, "keyframe_interval": 3, "input_size": [320, 240]}
+
+
+class StubCamera:
+    """Substitui camera.VideoCamera: mesma interface usada pelo app."""
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+                    cls._instance.current_frame = None
+                    cls._instance.latest_boxes = []
+                    # Dois quadros alternados: o app só reenvia JPEGs novos
+                    cls._instance.jpegs = [_make_jpeg(0), _make_jpeg(1)]
+                    cls._instance.frame_id = 0
+                    cls._instance.detector_version = 1
+                    cls._instance.controller = _StubController()
+        return cls._instance
+
+    def refresh_homography(self):
+        pass
+
+    def get_frame(self):
+        time.sleep(1.0 / STUB_FPS)
+        self.frame_id += 1
+        return self.jpegs[self.frame_id % 2]
+
+    def process_frame(self, frame, *args, **kwargs):
+        time.sleep(STUB_DETECT_MS / 1000.0)
+        return []
+
+
+def install():
+    """Registra o módulo 'camera' falso antes de importar o app."""
+    stub = types.ModuleType("camera")
+    stub.VideoCamera = StubCamera
+    stub.INFERENCE_SIZE = (320, 240)
+    sys.modules["camera"] = stub
+
+
+install()
+if __name__ != "__main__":
+    # Import via gunicorn: o banco vem de INCIDENTS_DB
+    from app import app # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", help="Banco de incidentes (ex: gerado por synth_data.py)")
+    parser.add_argument("--port", type=int, default=5050)
+    args = parser.parse_args()
+    if args.db:
+        # O banco é escolhido no import do incidents_manager
+        os.environ["INCIDENTS_DB"] = args.db
+    from app import app
+
+    print(f"Stub server na porta {args.port} (banco: {os.environ.get('INCIDENTS_DB', 'incidents.db')})")
+    app.run(host='0.0.0.0', port=args.port, debug=False, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
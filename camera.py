@@ -1,15 +1,38 @@
 import cv2
+import os
+import sys
 import threading
 import time
 import copy
 from ultralytics import YOLO
 import numpy as np
 from incidents_manager import incident_manager
+from incident_index import IncidentSpatialIndex, INCIDENT_TIMEOUT
+from tracker import Tracker
+from detection_store import detection_store
+from jpeg_codec import JpegEncoder
+from inference_controller import InferenceController, quality_levels
 
 # === Configurações ===
 MODEL_PATH = "best.pt"
+HOMOGRAPHY_PATH = "homography_matrix.npy"
 CONF_FIRE = 0.4
 CONF_SMOKE = 0.35
+INFERENCE_SIZE = (320, 240) # (largura, altura) da entrada do YOLO
+
+# Reconexão da câmera (backoff exponencial) após falhas seguidas de leitura
+MAX_GRAB_FAILURES = 10
+RECONNECT_MIN_DELAY = 0.5
+RECONNECT_MAX_DELAY = 30.0
+
+# Inferência completa a cada N frames; nos demais as tracks são propagadas
+KEYFRAME_INTERVAL = 3
+MODEL_STRIDE = 32 # Stride máximo do YOLO: imgsz precisa ser múltiplo dele
+
+# Controlador adaptativo: ajusta intervalo de keyframes, entrada do YOLO e
+# threads para manter a latência (inference_controller.py). False = fixo em
+# KEYFRAME_INTERVAL/INFERENCE_SIZE (a latência continua sendo medida).
+ADAPTIVE_INFERENCE = True
 
 # Configuração da Câmera
 # 0 = Câmera Nativa/Integrada
@@ -20,6 +43,112 @@ CAMERA_SOURCE = 0
 FIRE_KEYWORDS = ["fire", "fogo", "flame", "chama"]
 SMOKE_KEYWORDS = ["smoke", "fumaca", "fog", "smoke_cloud", "neblina"]
 
+# Cascata: o YOLO só roda em keyframes com regiões candidatas (cor de fogo/fumaça).
+# Desligada por padrão: ligue só depois que benchmarks/cascade_benchmark.py mostrar
+# recall sem perda nas imagens da câmera (chamas de núcleo branco escapam do filtro HSV)
+USE_PREFILTER = False
+PREFILTER_CROP = False # True = YOLO apenas no recorte das regiões candidatas
+PREFILTER_DEFAULTS = {
+    "fire_hsv": ((0, 80, 170), (35, 255, 255)),   # Laranja/amarelo saturado e brilhante
+    "smoke_hsv": ((0, 0, 80), (180, 60, 230)),    # Cinza (baixa saturação)
+    "flicker_var": 60.0,  # Variância temporal mínima do brilho (fumaça/chama em movimento)
+    "ema_alpha": 0.3,     # Peso do frame atual na média/variância temporal
+    "min_area": 0.002,    # Área mínima da região candidata (fração do frame)
+    "downscale": 4,       # O pré-filtro roda em 1/N da resolução
+    "max_skip": 30,       # Força o YOLO após N keyframes sem candidatos (rede de segurança)
+    "crop_margin": 0.25,  # Margem extra ao redor do recorte (fração do tamanho)
+}
+# Ajuste fino por câmera: {CAMERA_SOURCE: {"flicker_var": 90.0, ...}}
+PREFILTER_OVERRIDES = {}
+
+
+class FirePrefilter:
+    """
+    Primeiro estágio da cascata: acha regiões candidatas por cor (HSV) e
+    cintilação temporal, em NumPy/OpenCV vetorizado e em baixa resolução.
+
+    Cor de chama sozinha já é candidata; cor de fumaça (cinza) só conta onde
+    há variação temporal, senão paredes e céu nublado disparariam sempre.
+    """
+
+    def __init__(self, source=None, **overrides):
+        self.cfg = dict(PREFILTER_DEFAULTS)
+        self.cfg.update(PREFILTER_OVERRIDES.get(source, {}))
+        self.cfg.update(overrides)
+        self.mean = None
+        self.var = None
+        self.skipped_in_row = 0
+        self.stats = {"frames": 0, "skipped": 0, "forced": 0}
+
+    def candidates(self, frame):
+        """Retorna as caixas candidatas [x1, y1, x2, y2] em coordenadas do frame."""
+        cfg = self.cfg
+        h, w = frame.shape[:2]
+        n = cfg["downscale"]
+        small = cv2.resize(frame, (max(1, w // n), max(1, h // n)), interpolation=cv2.INTER_AREA)
+        hsv = cv2.cvtColor(small, cv2.COLOR_BGR2HSV)
+
+        # Média/variância exponencial do brilho (cintilação)
+        v = hsv[:, :, 2].astype(np.float32)
+        if self.mean is None or self.mean.shape != v.shape:
+            self.mean = v.copy()
+            self.var = np.zeros_like(v)
+        a = cfg["ema_alpha"]
+        diff = v - self.mean
+        self.mean += a * diff
+        self.var = (1 - a) * (self.var + a * diff * diff)
+
+        fire = cv2.inRange(hsv, *map(np.array, cfg["fire_hsv"]))
+        smoke = cv2.inRange(hsv, *map(np.array, cfg["smoke_hsv"]))
+        flicker = (self.var > cfg["flicker_var"]).astype(np.uint8) * 255
+        mask = cv2.bitwise_or(fire, cv2.bitwise_and(smoke, flicker))
+        mask = cv2.dilate(mask, None, iterations=2)
+
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        min_area = cfg["min_area"] * small.shape[0] * small.shape[1]
+        boxes = []
+        for cnt in contours:
+            x, y, bw, bh = cv2.boundingRect(cnt)
+            if bw * bh >= min_area:
+                boxes.append([x * n, y * n, min(w, (x + bw) * n), min(h, (y + bh) * n)])
+        return boxes
+
+    def gate(self, frame, crop=PREFILTER_CROP):
+        """
+        Decide se o YOLO deve rodar neste keyframe.
+        Retorna (rodar, roi), com roi=None para o frame inteiro.
+        """
+        self.stats["frames"] += 1
+        boxes = self.candidates(frame)
+        if not boxes:
+            self.skipped_in_row += 1
+            if self.skipped_in_row <= self.cfg["max_skip"]:
+                self.stats["skipped"] += 1
+                return False, None
+            self.stats["forced"] += 1
+        self.skipped_in_row = 0
+
+        if not crop or not boxes:
+            return True, None
+
+        # União das candidatas com margem; recorte grande demais não compensa
+        h, w = frame.shape[:2]
+        arr = np.array(boxes)
+        x1, y1 = arr[:, 0].min(), arr[:, 1].min()
+        x2, y2 = arr[:, 2].max(), arr[:, 3].max()
+        mx = int((x2 - x1) * self.cfg["crop_margin"])
+        my = int((y2 - y1) * self.cfg["crop_margin"])
+        roi = [max(0, x1 - mx), max(0, y1 - my), min(w, x2 + mx), min(h, y2 + my)]
+        if (roi[2] - roi[0]) * (roi[3] - roi[1]) > 0.5 * w * h:
+            return True, None
+        return True, roi
+
+
+def _model_imgsz(width, height, stride=MODEL_STRIDE):
+    """(altura, largura) da entrada do YOLO arredondadas para cima ao múltiplo do stride."""
+    return (-(-height // stride) * stride, -(-width // stride) * stride)
+
+
 class VideoCamera:
     _instance = None
     _lock = threading.Lock()
@@ -37,42 +166,47 @@ class VideoCamera:
         
         # Estado Compartilhado
         self.current_frame = None
-        self.latest_boxes = [] # [(x1,y1,x2,y2, tag, color, conf), ...]
+        self.latest_boxes = [] # [(x1,y1,x2,y2, tag, color, conf, rx, ry, track_id), ...]
+        self.frame_id = 0 # Incrementado a cada frame capturado
+        self.frame_time = 0.0 # Instante da decodificação do frame atual
+        self.tracker = Tracker()
+        self.controller = InferenceController(quality_levels(KEYFRAME_INTERVAL, INFERENCE_SIZE)) \
+            if ADAPTIVE_INFERENCE else \
+            InferenceController([(KEYFRAME_INTERVAL, INFERENCE_SIZE)], adapt_threads=False)
         
         # Controle
         self.started = False
         self.frame_lock = threading.Lock()
         self.box_lock = threading.Lock()
         self.last_trigger_time = 0 # Inicializa cooldown
+        self.incident_index = IncidentSpatialIndex() # Incidentes abertos (coordenadas reais)
+        self.listeners = [] # Callbacks de eventos (ex: agent.py): fn(evento, **dados)
+
+        # Stream: um encode por frame distinto, compartilhado entre espectadores
+        self.encoder = JpegEncoder()
+        self.encode_lock = threading.Lock()
+        self.canvas = None     # Buffer reutilizado para desenhar os overlays
+        self.jpeg_cache = None # (chave, bytes)
         
-        # Inicializa Câmera com Failover
-        # Tentativa 1: DirectShow (Melhor para Windows)
-        print(" [CAM] Tentando abrir com DirectShow (CAP_DSHOW)...")
-        self.cap = cv2.VideoCapture(CAMERA_SOURCE, cv2.CAP_DSHOW)
-        
-        # Tentativa 2: Default (Auto) se a 1 falhar
-        if not self.cap.isOpened():
-            print(" [CAM] DirectShow falhou. Tentando backend Padrão...")
-            self.cap = cv2.VideoCapture(CAMERA_SOURCE)
-            
-        if not self.cap.isOpened():
-             print(" [CAM] FATAL: Câmera não detectada/aberta.")
-             # Não levanta erro para não crashar o server, deixa rodar em modo 'NO SIGNAL'
-             # O loop de captura cuidará do fallback
-        else:
-             print(" [CAM] Câmera iniciada com sucesso.")
-        
-        # Seta resolução padrão (640x480) - Mais compatível
-        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-        
-        # OTIMIZAÇÃO DE LATÊNCIA: Buffer Size = 1
-        # Isso força o OpenCV a sempre pegar o frame mais recente e descartar antigos
-        try:
-             self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
-        except: pass
+        # Captura sob demanda: grab() sempre, retrieve() (decodificação) só quando pedido
+        self.grab_id = 0 # Incrementado a cada frame recebido (decodificado ou não)
+        self.frame_wanted = threading.Event()
+        self.frame_wanted.set()
+        self.cap = None
+        self._open_capture()
             
-        # Carrega modelo (pode demorar)
+        # Carrega modelo (pode demorar) e homografia
+        self._load_model()
+        self._load_homography()
+
+        # Cascata: pré-filtro de cor/cintilação antes do YOLO
+        self.prefilter = FirePrefilter(CAMERA_SOURCE) if USE_PREFILTER else None
+
+        # Inicia Threads
+        self.start()
+
+    def _load_model(self):
+        self.detector_version = getattr(self, 'detector_version', 0) + 1 # Invalida caches
         print(" [CAM] Carregando modelo YOLO...")
         try:
             self.model = YOLO(MODEL_PATH)
@@ -83,71 +217,25 @@ class VideoCamera:
             self.model = None
             self.names = {}
 
-        # Carrega Homografia
+    def _load_homography(self):
+        self.detector_version = getattr(self, 'detector_version', 0) + 1 # Invalida caches
         try:
-            self.homography_matrix = np.load("homography_matrix.npy")
+            self.homography_mtime = os.path.getmtime(HOMOGRAPHY_PATH)
+            self.homography_matrix = np.load(HOMOGRAPHY_PATH)
             print(" [CAM] Homografia carregada.")
         except:
-            print(" [CAM] AVISO: 'homography_matrix.npy' não encontrado.")
+            print(f" [CAM] AVISO: '{HOMOGRAPHY_PATH}' não encontrado.")
+            self.homography_mtime = None
             self.homography_matrix = None
 
-        # Inicia Threads
-        self.start()
-# ...
-    def trigger_actions(self, tipo_alerta, x=0.0, y=0.0):
-        current_time = time.time()
-        # Cooldown global (n8n/robot): 5 seconds
-        if current_time - self.last_trigger_time < 5.0: return
-        self.last_trigger_time = current_time
-        
-        # 0. Create Incident
-        print(f"[SYSTEM] Criando incidente automático: {tipo_alerta}")
-        incident_manager.create_incident(
-            type=f"Detecção de {tipo_alerta.capitalize()}",
-            tag=tipo_alerta.upper(),
-            priority="Crítica" if tipo_alerta == "fogo" else "Alta",
-            address=f"Coord: {x:.2f}, {y:.2f} (Camera 01)",
-            description=f"Detecção automática via IA. Confiança > 40%.",
-            status="Novo"
-        )
-        
-        # 1. Trigger n8n Webhook (Replaces Native WhatsApp)
-        self.trigger_n8n(tipo_alerta, x, y)
-        
-        # 2. Trigger ESP32 Robot
-        self.trigger_robot(x, y)
-
-    def trigger_n8n(self, tipo_alerta, x, y):
-        webhook_url = "https://gabrielbechtlufft.app.n8n.cloud/webhook-test/ligar"
-        def _send():
-            try:
-                import urllib.request
-                import urllib.parse
-                
-                params = {
-                    "alerta": f"{tipo_alerta}_detectado",
-                    "posX": f"{x:.2f}",
-                    "posY": f"{y:.2f}",
-                    "timestamp": str(time.time())
-                }
-                query_string = urllib.parse.urlencode(params)
-                
-                full_url = f"{webhook_url}"
-                if '?' in full_url: full_url += f"&{query_string}"
-                else: full_url += f"?{query_string}"
-                    
-                print(f"[n8n] Enviando: {full_url}")
-                req = urllib.request.Request(
-                    full_url, 
-                    method='GET',
-                    headers={"User-Agent": "Python-urllib/3.x"}
-                )
-                with urllib.request.urlopen(req, timeout=2) as response:
-                    print(f"[n8n] Status: {response.status}")
-            except Exception as e:
-                print(f"[n8n] Erro: {e}")
-                
-        threading.Thread(target=_send).start()
+    def refresh_homography(self):
+        """Recarrega a homografia se calibration.py gerou um arquivo novo."""
+        try:
+            mtime = os.path.getmtime(HOMOGRAPHY_PATH)
+        except OSError:
+            mtime = None
+        if mtime != self.homography_mtime:
+            self._load_homography()
 
     def start(self):
         if self.started:
@@ -155,15 +243,34 @@ class VideoCamera:
         self.started = True
         
         # Thread 1: Captura de Vídeo (Alta Velocidade)
-        self.t_cap = threading.Thread(target=self._capture_loop)
+        self.t_cap = threading.Thread(target=self._capture_loop, name="camera-capture")
         self.t_cap.daemon = True
         self.t_cap.start()
         
         # Thread 2: Inferência IA (Velocidade Variável)
-        self.t_inf = threading.Thread(target=self._inference_loop)
+        self.t_inf = threading.Thread(target=self._inference_loop, name="camera-inference")
         self.t_inf.daemon = True
         self.t_inf.start()
 
+        # Thread 3: Gravação da série temporal de detecções
+        detection_store.start()
+
+    def add_listener(self, callback):
+        """
+        Registra fn(evento, **dados), chamada na thread de inferência:
+          "detections"        detections, frame, ts (keyframes com detecções)
+          "incident_created"  incident (dict de create_incident)
+          "incident_updated"  id, confidence, extent, detections, last_seen
+        """
+        self.listeners.append(callback)
+
+    def _notify(self, event, **data):
+        for callback in self.listeners:
+            try:
+                callback(event, **data)
+            except Exception as e:
+                print(f" [CAM] Erro no listener ({event}): {e}")
+
     def get_label(self, cls_idx):
         if isinstance(self.names, dict):
             return str(self.names.get(cls_idx, cls_idx))
@@ -175,45 +282,140 @@ class VideoCamera:
     def is_smoke(self, label):
         return any(word in label.lower() for word in SMOKE_KEYWORDS)
 
+    @staticmethod
+    def _capture_backends(source):
+        """Backends do OpenCV em ordem de preferência para a plataforma/fonte."""
+        if isinstance(source, str) and "://" in source:
+            return [cv2.CAP_FFMPEG, cv2.CAP_ANY] # Câmera IP (RTSP/HTTP)
+        if sys.platform.startswith("win"):
+            return [cv2.CAP_DSHOW, cv2.CAP_MSMF, cv2.CAP_ANY]
+        if sys.platform == "darwin":
+            return [cv2.CAP_AVFOUNDATION, cv2.CAP_ANY]
+        return [cv2.CAP_V4L2, cv2.CAP_ANY]
+
+    def _open_capture(self):
+        """(Re)abre a fonte de vídeo. Retorna True se conseguiu."""
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+        for backend in self._capture_backends(CAMERA_SOURCE):
+            print(f" [CAM] Tentando abrir {CAMERA_SOURCE} (backend {backend})...")
+            cap = cv2.VideoCapture(CAMERA_SOURCE, backend)
+            if cap.isOpened():
+                break
+            cap.release()
+        else:
+            print(" [CAM] FATAL: Câmera não detectada/aberta.")
+            # Não levanta erro para não crashar o server, deixa rodar em modo 'NO SIGNAL'
+            # O loop de captura cuidará da reconexão
+            return False
+
+        # Seta resolução padrão (640x480) - Mais compatível
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+        
+        # OTIMIZAÇÃO DE LATÊNCIA: Buffer Size = 1
+        # Isso força o OpenCV a sempre pegar o frame mais recente e descartar antigos
+        try:
+             cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        except: pass
+
+        print(" [CAM] Câmera iniciada com sucesso.")
+        self.cap = cap
+        return True
+
+    def _show_no_signal(self):
+        h, w = 480, 640
+        blank_frame = np.zeros((h, w, 3), np.uint8)
+        cv2.putText(blank_frame, "NO SIGNAL", (w//2 - 60, h//2), 
+                    cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
+        with self.frame_lock:
+            self.current_frame = blank_frame
+            self.frame_time = time.time()
+            self.frame_id += 1
+
     def _capture_loop(self):
-        """Lê frames da câmera o mais rápido possível."""
+        """
+        Drena a câmera com grab() (sem decodificar) e só decodifica com
+        retrieve() quando algum consumidor pediu frame (frame_wanted).
+        Em falha, reabre a fonte com backoff exponencial.
+        """
         frame_count = 0
+        failures = 0
+        backoff = RECONNECT_MIN_DELAY
         while self.started:
-            success, frame = self.cap.read()
-            if success:
-                # Debug logging to verify stream
-                frame_count += 1
-                if frame_count % 100 == 0:
-                    print(f" [CAM] Frame capturado: {frame_count} ({frame.shape})")
-
-                # Resize leve para garantir consistência se a câmera teimar em vir alta
-                h, w = frame.shape[:2]
-                if h > 480: 
-                    frame = cv2.resize(frame, (640, 480))
-                
-                with self.frame_lock:
-                    self.current_frame = frame
-            else:
-                print(" [CAM] Falha ao ler frame (success=False).")
-                # Capture failed - Create placeholder
-                h, w = 480, 640
-                blank_frame = np.zeros((h, w, 3), np.uint8)
-                cv2.putText(blank_frame, "NO SIGNAL", (w//2 - 60, h//2), 
-                            cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
-                with self.frame_lock:
-                    self.current_frame = blank_frame
-                time.sleep(0.5) # Wait before retry
-            time.sleep(0.005) # Yield
-
-    def process_frame(self, frame):
-        """Processa um frame arbitrário e retorna as detecções."""
+            if self.cap is None:
+                if not self._open_capture():
+                    self._show_no_signal()
+                    print(f" [CAM] Nova tentativa em {backoff:.1f}s.")
+                    time.sleep(backoff)
+                    backoff = min(backoff * 2, RECONNECT_MAX_DELAY)
+                    continue
+                failures = 0
+
+            # grab() bloqueia até o próximo frame: não precisa de sleep
+            if not self.cap.grab():
+                failures += 1
+                if failures >= MAX_GRAB_FAILURES:
+                    print(f" [CAM] {failures} falhas seguidas de leitura. Reconectando...")
+                    self.cap.release()
+                    self.cap = None
+                    self._show_no_signal()
+                else:
+                    time.sleep(0.05)
+                continue
+            failures = 0
+            backoff = RECONNECT_MIN_DELAY
+            with self.frame_lock:
+                self.grab_id += 1
+
+            # Ninguém precisa de pixels novos: descarta sem decodificar
+            if not self.frame_wanted.is_set():
+                continue
+            self.frame_wanted.clear()
+
+            success, frame = self.cap.retrieve()
+            if not success:
+                continue
+
+            # Debug logging to verify stream
+            frame_count += 1
+            if frame_count % 100 == 0:
+                print(f" [CAM] Frame decodificado: {frame_count} ({frame.shape})")
+
+            # Resize leve para garantir consistência se a câmera teimar em vir alta
+            h, w = frame.shape[:2]
+            if h > 480: 
+                frame = cv2.resize(frame, (640, 480))
+            
+            with self.frame_lock:
+                self.current_frame = frame
+                self.frame_time = time.time()
+                self.frame_id += 1
+
+    def process_frame(self, frame, roi=None, src_scale=1, size=None):
+        """
+        Processa um frame arbitrário e retorna as detecções.
+        Com roi=[x1, y1, x2, y2] a inferência roda só no recorte, mas as caixas
+        voltam em coordenadas do frame inteiro. src_scale é a redução já aplicada
+        na decodificação (jpeg_codec.decode): as caixas voltam na resolução original.
+        size=(largura, altura) da entrada do YOLO (padrão INFERENCE_SIZE).
+        """
         if self.model is None: return []
 
-        # Resize para inferência (320x240)
-        inf_frame = cv2.resize(frame, (320, 240))
+        offset_x, offset_y = 0, 0
+        if roi is not None:
+            offset_x, offset_y = roi[0], roi[1]
+            frame = frame[roi[1]:roi[3], roi[0]:roi[2]]
+
+        # Resize para inferência (INTER_AREA: o frame quase sempre é maior)
+        inf_w, inf_h = size or INFERENCE_SIZE
+        inf_frame = cv2.resize(frame, (inf_w, inf_h), interpolation=cv2.INTER_AREA)
         
         try:
-            results_list = self.model(inf_frame, verbose=False)
+            # imgsz = entrada real da rede; sem ele o Ultralytics amplia tudo para 640
+            results_list = self.model(inf_frame, imgsz=_model_imgsz(inf_w, inf_h), verbose=False)
             if not results_list: return []
             results = results_list[0]
         except Exception as e:
@@ -221,8 +423,8 @@ class VideoCamera:
             return []
         
         # Escala de volta
-        scale_x = frame.shape[1] / 320
-        scale_y = frame.shape[0] / 240
+        scale_x = frame.shape[1] / inf_w
+        scale_y = frame.shape[0] / inf_h
         
         detections = []
         for box in results.boxes:
@@ -244,10 +446,10 @@ class VideoCamera:
                 color = (0, 0, 255) if fire_detect else (0, 255, 255) # BGR para OpenCV
                 
                 # Ajusta coordenadas
-                x1 = int(x1 * scale_x)
-                x2 = int(x2 * scale_x)
-                y1 = int(y1 * scale_y)
-                y2 = int(y2 * scale_y)
+                x1 = int((x1 * scale_x + offset_x) * src_scale)
+                x2 = int((x2 * scale_x + offset_x) * src_scale)
+                y1 = int((y1 * scale_y + offset_y) * src_scale)
+                y2 = int((y2 * scale_y + offset_y) * src_scale)
                 
                 # Real World Coords
                 real_x, real_y = 0.0, 0.0
@@ -270,60 +472,101 @@ class VideoCamera:
         return detections
 
     def _inference_loop(self):
-        """Roda YOLO no frame mais recente disponível."""
+        """
+        Roda YOLO apenas nos keyframes e propaga as tracks nos frames intermediários.
+        """
+        last_frame_id = -1
+        last_grab_id = -1
+        frame_index = 0
         while self.started:
-            frame_to_process = None
-            
+            keyframe = frame_index % self.controller.keyframe_interval == 0
+            if keyframe:
+                # Só o keyframe precisa de pixels (e de cópia do frame)
+                self.frame_wanted.set()
             with self.frame_lock:
-                if self.current_frame is not None:
-                    frame_to_process = self.current_frame.copy()
+                if keyframe:
+                    new_frame = self.current_frame is not None and self.frame_id != last_frame_id
+                    if new_frame:
+                        last_frame_id = self.frame_id
+                        frame_to_process = self.current_frame.copy()
+                        frame_time = self.frame_time
+                else:
+                    # Frames intermediários só avançam as tracks (nem decodificam)
+                    new_frame = self.grab_id != last_grab_id
+                if new_frame:
+                    last_grab_id = self.grab_id
             
-            if frame_to_process is None:
-                time.sleep(0.1)
+            if not new_frame:
+                time.sleep(0.01)
                 continue
-
-            # Usa o método compartilhado
-            detections = self.process_frame(frame_to_process)
+            frame_index += 1
+
+            if keyframe:
+                # Cascata: YOLO só se o pré-filtro achar regiões candidatas
+                run, roi = True, None
+                if self.prefilter is not None:
+                    run, roi = self.prefilter.gate(frame_to_process)
+
+                # Usa o método compartilhado
+                raw = self.process_frame(frame_to_process, roi, size=self.controller.input_size) if run else []
+                detections = self.tracker.update(raw)
+                if run:
+                    # Latência de detecção: frame decodificado -> detecções prontas
+                    self.controller.record(time.time() - frame_time)
+                detection_store.append(detections)
+                if detections and self.listeners:
+                    self._notify("detections", detections=detections, frame=frame_to_process, ts=time.time())
+
+                # Alertas apenas para detecções reais (não para caixas propagadas)
+                for d in detections:
+                    rx, ry = d['coords']
+                    if d['tag'] == "FOGO": self.trigger_actions("fogo", rx, ry, d['conf'], d['track_id'])
+                    elif d['tag'] == "FUMACA": self.trigger_actions("fumaca", rx, ry, d['conf'], d['track_id'])
+                tracks = [t.to_detection() for t in self.tracker.tracks]
+            else:
+                tracks = self.tracker.predict()
             
             # Converte formato interno para o formato esperado pela UI server-side
-            # (x1, y1, x2, y2, tag, color, conf, real_x, real_y)
+            # (x1, y1, x2, y2, tag, color, conf, real_x, real_y, track_id)
             new_boxes = []
-            for d in detections:
+            for d in tracks:
                 x1, y1, x2, y2 = d['box']
-                tag = d['tag']
-                color = d['color']
-                conf = d['conf']
                 rx, ry = d['coords']
-                # Trigger Actions (apenas na câmera do servidor, por enquanto, ou compartilhado?)
-                # Se for compartilhado, chamaria aqui.
-                # Mantendo lógica original de trigger:
-                
-                if tag == "FOGO": self.trigger_actions("fogo", rx, ry)
-                elif tag == "FUMACA": self.trigger_actions("fumaca", rx, ry)
-                
-                new_boxes.append((x1, y1, x2, y2, tag, color, conf, rx, ry))
+                new_boxes.append((x1, y1, x2, y2, d['tag'], d['color'], d['conf'], rx, ry, d['track_id']))
             
             with self.box_lock:
                 self.latest_boxes = new_boxes
-                
-            time.sleep(0.01) 
+
+            self._maintain_incidents()
             
-    def trigger_actions(self, tipo_alerta, x=0.0, y=0.0):
+    def trigger_actions(self, tipo_alerta, x=0.0, y=0.0, conf=0.0, track_id=None):
         current_time = time.time()
+        tag = tipo_alerta.upper()
+
+        # Detecção próxima de um incidente aberto (ou da mesma track): apenas agrega
+        open_incident = self.incident_index.find(tag, x, y, track_id)
+        if open_incident is not None:
+            self.incident_index.update(open_incident, x, y, conf, current_time, track_id)
+            return
+
         # Cooldown global (n8n/robot): 5 seconds
         if current_time - self.last_trigger_time < 5.0: return
         self.last_trigger_time = current_time
         
         # 0. Create Incident
         print(f"[SYSTEM] Criando incidente automático: {tipo_alerta}")
-        incident_manager.create_incident(
+        incident = incident_manager.create_incident(
             type=f"Detecção de {tipo_alerta.capitalize()}",
-            tag=tipo_alerta.upper(),
+            tag=tag,
             priority="Crítica" if tipo_alerta == "fogo" else "Alta",
             address=f"Coord: {x:.2f}, {y:.2f} (Camera 01)",
             description=f"Detecção automática via IA. Confiança > 40%.",
-            status="Novo"
+            status="Novo",
+            confidence=conf,
+            extent=[x, y, x, y]
         )
+        self.incident_index.add(incident["id"], tag, x, y, conf, current_time, track_id)
+        self._notify("incident_created", incident=incident)
         
         # 1. Automatic WhatsApp (Only for Fire, with longer cooldown)
         if tipo_alerta == "fogo":
@@ -335,6 +578,26 @@ class VideoCamera:
         # 3. Trigger ESP32 Robot
         self.trigger_robot(x, y)
 
+    def _maintain_incidents(self):
+        """Persiste a agregação dos incidentes abertos e fecha os inativos."""
+        now = time.time()
+        for inc in self.incident_index.expire(now):
+            if inc.dirty:
+                incident_manager.touch_incident(inc.id, **inc.snapshot())
+                self._notify("incident_updated", id=inc.id, **inc.snapshot())
+            print(f"[SYSTEM] Incidente {inc.id} sem detecções há {INCIDENT_TIMEOUT:.0f}s. Fechado no índice.")
+
+        for inc in self.incident_index.due_for_flush(now):
+            inc.dirty = False
+            inc.last_flush = now
+            if not incident_manager.touch_incident(inc.id, **inc.snapshot()):
+                # Excluído ou encerrado pelo operador: a próxima detecção abre
+                # um incidente novo (e dispara os alertas) em vez de agregar nele
+                self.incident_index.remove(inc.id)
+                print(f"[SYSTEM] Incidente {inc.id} encerrado/removido pelo operador. Fora do índice.")
+            else:
+                self._notify("incident_updated", id=inc.id, **inc.snapshot())
+
     def trigger_whatsapp(self, x, y):
         # WhatsApp Cooldown: 60 seconds to avoid spamming usage
         if not hasattr(self, 'last_whatsapp_time'): self.last_whatsapp_time = 0
@@ -385,7 +648,7 @@ class VideoCamera:
             except Exception as e:
                 print(f"[n8n] Erro: {e}")
                 
-        threading.Thread(target=_send).start()
+        threading.Thread(target=_send, name="alert-n8n").start()
 
     def trigger_robot(self, x, y):
         # Envia comando para ESP32
@@ -400,32 +663,45 @@ class VideoCamera:
                 with urllib.request.urlopen(url, timeout=1): pass
             except Exception as e:
                 print(f"[ROBOT] Erro ao conectar: {e}")
-        threading.Thread(target=_send_bot).start() 
+        threading.Thread(target=_send_bot, name="alert-robot").start() 
 
     def get_frame(self):
-        """Gera o JPEG final para streaming."""
-        frame = None
-        with self.frame_lock:
-            if self.current_frame is not None:
-                frame = self.current_frame.copy()
-        
-        if frame is None:
-            return None
+        """
+        Gera o JPEG final para streaming. Espectadores simultâneos recebem o
+        mesmo JPEG enquanto frame, caixas e relógio não mudarem.
+        """
+        self.frame_wanted.set() # Pede um frame decodificado para a próxima chamada
 
         # Desenha caixas (pegando a lista mais recente da IA)
-        boxes = []
         with self.box_lock:
             boxes = list(self.latest_boxes)
-        
+        timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
+
+        with self.encode_lock:
+            with self.frame_lock:
+                if self.current_frame is None:
+                    return None
+                key = (self.frame_id, boxes, timestamp)
+                if self.jpeg_cache is not None and self.jpeg_cache[0] == key:
+                    return self.jpeg_cache[1]
+                if self.canvas is None or self.canvas.shape != self.current_frame.shape:
+                    self.canvas = np.empty_like(self.current_frame)
+                np.copyto(self.canvas, self.current_frame)
+            jpeg = self._render(self.canvas, boxes, timestamp)
+            self.jpeg_cache = (key, jpeg)
+            return jpeg
+
+    def _render(self, frame, boxes, timestamp):
+        """Desenha caixas e overlays CCTV em frame (in-place) e codifica."""
         fogo_detectado = False
         fumaca_detectada = False
         h, w = frame.shape[:2]
 
-        for (x1, y1, x2, y2, tag, color, conf, rx, ry) in boxes:
+        for (x1, y1, x2, y2, tag, color, conf, rx, ry, track_id) in boxes:
             cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
             
             # Label
-            label_text = f"{tag} {conf:.2f}"
+            label_text = f"#{track_id} {tag} {conf:.2f}"
             if rx != 0 or ry != 0:
                 label_text += f" | X:{rx:.1f}m Y:{ry:.1f}m"
                 
@@ -445,7 +721,6 @@ class VideoCamera:
                         cv2.FONT_HERSHEY_PLAIN, 1.5, (0, 255, 255), 2)
 
         # Timestamp
-        timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
         cv2.putText(frame, timestamp, (10, h - 10), 
                     cv2.FONT_HERSHEY_PLAIN, 1.0, (255, 255, 255), 1)
         
@@ -454,5 +729,4 @@ class VideoCamera:
                     cv2.FONT_HERSHEY_PLAIN, 0.8, (0, 255, 0), 1)
 
         # Encode JPEG (qualidade média para fluidez)
-        ret, jpeg = cv2.imencode('.jpg', frame, [int(cv2.IMWRITE_JPEG_QUALITY), 60])
-        return jpeg.tobytes()
+        return self.encoder.encode(frame)
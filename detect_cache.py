@@ -0,0 +1,145 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+# === Configurações ===
+CACHE_MAX_ENTRIES = 1024
+CACHE_MAX_BYTES = 8 * 1024 * 1024 # Tamanho estimado dos resultados guardados
+CACHE_TTL = 300.0                 # Segundos
+# Quase-duplicatas (dHash) são opcionais: numa câmera fixa, uma chama pequena quase
+# não muda o hash 9x8, e o resultado "sem fogo" seria reaproveitado. Desligado por
+# padrão; a requisição pode pedir com near=1.
+NEAR_DUPLICATES = False
+NEAR_TTL = 15.0                   # Idade máxima (s) de um resultado reaproveitado por semelhança
+PHASH_MAX_DISTANCE = 4            # Bits diferentes (de 64) para considerar quase-duplicata
+ENTRY_OVERHEAD = 256              # Bytes estimados por entrada além do resultado
+
+
+def content_key(data):
+    """Hash do conteúdo enviado (bytes do upload)."""
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def perceptual_key(frame, scale=1):
+    """
+    (altura, largura, escala, dHash): só imagens do mesmo tamanho original são
+    comparadas, pois as caixas estão em pixels. `scale` é o fator da
+    decodificação reduzida (jpeg_codec.decode): 640x480 a 1/2 e 1280x960 a 1/4
+    viram o mesmo 320x240, mas as caixas voltam em escalas diferentes.
+    """
+    h, w = frame.shape[:2]
+    return h, w, scale, dhash(frame)
+
+
+def dhash(frame):
+    """Hash perceptual (difference hash) de 64 bits de um frame BGR."""
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+class _Entry:
+    __slots__ = ("result", "size", "created", "expires", "phash")
+
+    def __init__(self, result, size, created, expires, phash):
+        self.result = result
+        self.size = size
+        self.created = created
+        self.expires = expires
+        self.phash = phash
+
+
+class DetectionCache:
+    """
+    Cache LRU de resultados do /api/detect.
+
+    Chave exata = hash dos bytes enviados; opcionalmente (NEAR_DUPLICATES ou near=1),
+    busca de quase-duplicatas recentes pelo dHash do frame decodificado. Expira por TTL, despeja por número de
+    entradas e por memória estimada, e é esvaziado quando a versão do detector
+    (modelo/homografia) muda.
+    """
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, max_bytes=CACHE_MAX_BYTES,
+                 ttl=CACHE_TTL, phash_distance=PHASH_MAX_DISTANCE, near_ttl=NEAR_TTL):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.near_ttl = near_ttl
+        self.phash_distance = phash_distance
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.generation = None
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "near_hits": 0, "misses": 0,
+                      "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    def check_generation(self, generation):
+        """Descarta tudo se o modelo ou a homografia mudaram."""
+        with self.lock:
+            if generation != self.generation:
+                if self.entries:
+                    self.stats["invalidations"] += 1
+                self.entries.clear()
+                self.bytes = 0
+                self.generation = generation
+
+    def _drop(self, key):
+        entry = self.entries.pop(key)
+        self.bytes -= entry.size
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires < time.monotonic():
+                self._drop(key)
+                self.stats["expirations"] += 1
+                return None
+            self.entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry.result
+
+    def get_similar(self, phash):
+        """
+        Resultado de uma imagem quase idêntica (mesmo tamanho e distância de
+        Hamming do dHash pequena), com phash vindo de perceptual_key().
+        Só resultados com menos de near_ttl segundos: a cena pode ter mudado
+        sem mudar o hash. Chamado após get() falhar; conta o miss se nada for encontrado.
+        """
+        now = time.monotonic()
+        with self.lock:
+            for key, entry in reversed(self.entries.items() if phash is not None else ()):
+                if entry.phash is None or entry.created + self.near_ttl < now or entry.phash[:3] != phash[:3]:
+                    continue
+                if bin(entry.phash[3] ^ phash[3]).count("1") <= self.phash_distance:
+                    self.entries.move_to_end(key)
+                    self.stats["near_hits"] += 1
+                    return entry.result
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, key, result, phash=None):
+        size = len(json.dumps(result)) + ENTRY_OVERHEAD
+        with self.lock:
+            if key in self.entries:
+                self._drop(key)
+            now = time.monotonic()
+            self.entries[key] = _Entry(result, size, now, now + self.ttl, phash)
+            self.bytes += size
+            while self.entries and (len(self.entries) > self.max_entries or self.bytes > self.max_bytes):
+                self._drop(next(iter(self.entries)))
+                self.stats["evictions"] += 1
+
+    def metrics(self):
+        with self.lock:
+            lookups = self.stats["hits"] + self.stats["near_hits"] + self.stats["misses"]
+            hit_rate = (self.stats["hits"] + self.stats["near_hits"]) / lookups if lookups else 0.0
+            return dict(self.stats, entries=len(self.entries), bytes=self.bytes,
+                        hit_rate=round(hit_rate, 4))
@@ -0,0 +1,283 @@
+"""
+Série temporal compacta de todas as detecções (separada do incidents.db).
+
+Cada detecção vira um registro binário de tamanho fixo (DETECTION_DTYPE,
+35 bytes) anexado a um segmento por hora: <DETECTIONS_DIR>/AAAAMMDD/HH.bin
+(UTC). A leitura é feita com np.memmap, sem carregar o arquivo inteiro.
+
+Uma thread em segundo plano grava o buffer a cada FLUSH_INTERVAL e, quando a
+hora fecha, gera os rollups por minuto (HH.m1.npy) e por hora (HH.h1.npy).
+Os rollups guardam somas (não médias) para poderem ser reagregados.
+"""
+import calendar
+import os
+import threading
+import time
+
+import numpy as np
+
+# === Configurações ===
+DETECTIONS_DIR = os.environ.get("DETECTIONS_DIR", "detections")
+SEGMENT_SECONDS = 3600   # Um arquivo por hora
+FLUSH_INTERVAL = 2.0     # Segundos entre gravações do buffer
+ROLLUP_INTERVAL = 60.0   # Segundos entre verificações de segmentos fechados
+RETENTION_DAYS = 30      # Dados brutos mais antigos são apagados (rollups ficam); 0 = nunca
+CAMERA_ID = 1            # Câmera local (Camera 01)
+
+TAG_CODES = {"FOGO": 1, "FUMACA": 2}
+TAG_NAMES = {v: k for k, v in TAG_CODES.items()}
+
+RESOLUTIONS = {"minute": 60, "hour": 3600}
+ROLLUP_SUFFIX = {"minute": ".m1.npy", "hour": ".h1.npy"}
+
+DETECTION_DTYPE = np.dtype([
+    ("ts", "<f8"),           # Epoch (s)
+    ("camera", "<u2"),
+    ("tag", "u1"),           # TAG_CODES (0 = outro)
+    ("track", "<i4"),        # track_id (-1 = sem track)
+    ("conf", "<f4"),
+    ("box", "<i2", (4,)),    # x1, y1, x2, y2 em pixels
+    ("wx", "<f4"),           # Coordenadas no mundo (homografia)
+    ("wy", "<f4"),
+])
+
+ROLLUP_DTYPE = np.dtype([
+    ("ts", "<f8"),           # Início do intervalo
+    ("camera", "<u2"),
+    ("tag", "u1"),
+    ("count", "<u4"),
+    ("conf_sum", "<f8"),
+    ("conf_max", "<f4"),
+    ("area_sum", "<f8"),     # Soma das áreas das caixas (px²)
+])
+
+
+def _aggregate(ts, camera, tag, count, conf_sum, conf_max, area_sum, resolution):
+    """Agrupa por (intervalo, câmera, tag) de forma vetorizada."""
+    if len(ts) == 0:
+        return np.zeros(0, ROLLUP_DTYPE)
+    keys = np.empty(len(ts), [("ts", "<f8"), ("camera", "<u2"), ("tag", "u1")])
+    keys["ts"] = np.floor(ts / resolution) * resolution
+    keys["camera"] = camera
+    keys["tag"] = tag
+    uniq, inverse = np.unique(keys, return_inverse=True)
+    inverse = inverse.ravel()
+
+    out = np.zeros(len(uniq), ROLLUP_DTYPE)
+    out["ts"] = uniq["ts"]
+    out["camera"] = uniq["camera"]
+    out["tag"] = uniq["tag"]
+    out["count"] = np.bincount(inverse, weights=count, minlength=len(uniq))
+    out["conf_sum"] = np.bincount(inverse, weights=conf_sum, minlength=len(uniq))
+    out["area_sum"] = np.bincount(inverse, weights=area_sum, minlength=len(uniq))
+    np.maximum.at(out["conf_max"], inverse, conf_max)
+    return out
+
+
+def rollup_records(records, resolution):
+    """Rollup de registros brutos (DETECTION_DTYPE)."""
+    box = records["box"].astype(np.float64)
+    area = np.abs((box[:, 2] - box[:, 0]) * (box[:, 3] - box[:, 1])) if len(records) else np.zeros(0)
+    return _aggregate(records["ts"], records["camera"], records["tag"],
+                      np.ones(len(records)), records["conf"], records["conf"], area, resolution)
+
+
+def records_as_dicts(records):
+    """Registros brutos em formato JSON."""
+    return [{"ts": float(r["ts"]), "camera": int(r["camera"]),
+             "tag": TAG_NAMES.get(int(r["tag"]), "OUTRO"), "track_id": int(r["track"]),
+             "conf": round(float(r["conf"]), 3), "box": r["box"].tolist(),
+             "coords": [round(float(r["wx"]), 3), round(float(r["wy"]), 3)]}
+            for r in records]
+
+
+def rollups_as_dicts(rollups):
+    """Rollups em formato JSON (médias calculadas a partir das somas)."""
+    return [{"ts": float(r["ts"]), "camera": int(r["camera"]),
+             "tag": TAG_NAMES.get(int(r["tag"]), "OUTRO"), "count": int(r["count"]),
+             "conf_mean": round(float(r["conf_sum"]) / r["count"], 3),
+             "conf_max": round(float(r["conf_max"]), 3),
+             "area_mean": round(float(r["area_sum"]) / r["count"], 1)}
+            for r in rollups if r["count"]]
+
+
+class DetectionStore:
+    """Armazena detecções em segmentos horários e responde consultas por intervalo."""
+
+    def __init__(self, root=DETECTIONS_DIR):
+        self.root = root
+        self.pending = []
+        self.lock = threading.Lock()     # Buffer em memória
+        self.io_lock = threading.Lock()  # Escrita de segmentos e rollups
+        self.thread = None
+        self.stats = {"records": 0, "flushes": 0, "rollups": 0, "purged": 0}
+
+    def start(self):
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, daemon=True, name="detection-store")
+                self.thread.start()
+
+    # --- Escrita ---
+    def append(self, detections, ts=None, camera=CAMERA_ID):
+        """Enfileira detecções no formato de process_frame/Tracker.update."""
+        if not detections:
+            return
+        rec = np.zeros(len(detections), DETECTION_DTYPE)
+        rec["ts"] = time.time() if ts is None else ts
+        rec["camera"] = camera
+        rec["tag"] = [TAG_CODES.get(d["tag"], 0) for d in detections]
+        rec["track"] = [-1 if d.get("track_id") is None else d["track_id"] for d in detections]
+        rec["conf"] = [d["conf"] for d in detections]
+        rec["box"] = [d["box"] for d in detections]
+        coords = np.asarray([d["coords"] for d in detections], dtype=np.float32)
+        rec["wx"] = coords[:, 0]
+        rec["wy"] = coords[:, 1]
+        with self.lock:
+            self.pending.append(rec)
+
+    def flush(self):
+        """Anexa o buffer aos segmentos das respectivas horas."""
+        with self.lock:
+            if not self.pending:
+                return
+            pending, self.pending = self.pending, []
+        records = np.concatenate(pending)
+        segments = (records["ts"] // SEGMENT_SECONDS).astype(np.int64)
+        with self.io_lock:
+            for seg in np.unique(segments):
+                path = self._segment_path(int(seg) * SEGMENT_SECONDS)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "ab") as f:
+                    f.write(records[segments == seg].tobytes())
+        self.stats["records"] += len(records)
+        self.stats["flushes"] += 1
+
+    # --- Leitura ---
+    def _segment_path(self, seg_start, suffix=".bin"):
+        t = time.gmtime(seg_start)
+        return os.path.join(self.root, time.strftime("%Y%m%d", t), f"{t.tm_hour:02d}{suffix}")
+
+    def _segment_starts(self, start, end):
+        first = int(start // SEGMENT_SECONDS)
+        last = int(np.ceil(end / SEGMENT_SECONDS))
+        for seg in range(first, last):
+            yield seg * SEGMENT_SECONDS
+
+    @staticmethod
+    def _read_segment(path):
+        """Mapeia o segmento em memória (ignora um registro final incompleto)."""
+        try:
+            n = os.path.getsize(path) // DETECTION_DTYPE.itemsize
+        except OSError:
+            return None
+        if n == 0:
+            return None
+        return np.memmap(path, dtype=DETECTION_DTYPE, mode="r", shape=(n,))
+
+    @staticmethod
+    def _mask(arr, start, end, tag, camera):
+        mask = (arr["ts"] >= start) & (arr["ts"] < end)
+        if tag is not None:
+            mask &= arr["tag"] == TAG_CODES.get(tag, 0)
+        if camera is not None:
+            mask &= arr["camera"] == camera
+        return mask
+
+    def query(self, start, end, tag=None, camera=None):
+        """Registros brutos em [start, end), em ordem de gravação."""
+        self.flush()
+        parts = []
+        for seg_start in self._segment_starts(start, end):
+            arr = self._read_segment(self._segment_path(seg_start))
+            if arr is not None:
+                parts.append(np.array(arr[self._mask(arr, start, end, tag, camera)]))
+        return np.concatenate(parts) if parts else np.zeros(0, DETECTION_DTYPE)
+
+    def _load_rollup(self, seg_start, resolution):
+        """Rollup gravado (pequeno) se estiver atualizado; senão calcula do segmento bruto."""
+        raw = self._segment_path(seg_start)
+        path = self._segment_path(seg_start, ROLLUP_SUFFIX[resolution])
+        try:
+            if os.path.getmtime(path) >= os.path.getmtime(raw):
+                return np.load(path)
+        except OSError:
+            if not os.path.exists(raw):
+                # Bruto já apagado pela retenção: vale o rollup, se houver
+                return np.load(path) if os.path.exists(path) else None
+        arr = self._read_segment(raw)
+        return rollup_records(arr, RESOLUTIONS[resolution]) if arr is not None else None
+
+    def rollup(self, start, end, resolution="hour", tag=None, camera=None):
+        """Agregados por intervalo em [start, end); cada intervalo cabe em um segmento."""
+        self.flush()
+        step = RESOLUTIONS[resolution]
+        start = np.floor(start / step) * step
+        parts = []
+        for seg_start in self._segment_starts(start, end):
+            arr = self._load_rollup(seg_start, resolution)
+            if arr is not None:
+                parts.append(np.array(arr[self._mask(arr, start, end, tag, camera)]))
+        return np.concatenate(parts) if parts else np.zeros(0, ROLLUP_DTYPE)
+
+    # --- Manutenção em segundo plano ---
+    def _segment_files(self):
+        """(início do segmento, caminho) de todos os segmentos brutos."""
+        if not os.path.isdir(self.root):
+            return
+        for day in sorted(os.listdir(self.root)):
+            day_dir = os.path.join(self.root, day)
+            if not os.path.isdir(day_dir):
+                continue
+            for name in sorted(os.listdir(day_dir)):
+                if not name.endswith(".bin"):
+                    continue
+                try:
+                    t = time.strptime(f"{day}{name[:2]}", "%Y%m%d%H")
+                except ValueError:
+                    continue
+                yield calendar.timegm(t), os.path.join(day_dir, name)
+
+    def compact(self, now=None):
+        """Gera rollups dos segmentos fechados e aplica a retenção dos dados brutos."""
+        now = time.time() if now is None else now
+        closed_before = now - 2 * FLUSH_INTERVAL
+        for seg_start, raw in list(self._segment_files()):
+            if seg_start + SEGMENT_SECONDS > closed_before:
+                continue
+            with self.io_lock:
+                for resolution, suffix in ROLLUP_SUFFIX.items():
+                    path = self._segment_path(seg_start, suffix)
+                    if os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(raw):
+                        continue
+                    arr = self._read_segment(raw)
+                    data = rollup_records(arr, RESOLUTIONS[resolution]) if arr is not None \
+                        else np.zeros(0, ROLLUP_DTYPE)
+                    tmp = path + ".tmp"
+                    with open(tmp, "wb") as f:
+                        np.save(f, data)
+                    os.replace(tmp, path)
+                    self.stats["rollups"] += 1
+                if RETENTION_DAYS and seg_start + SEGMENT_SECONDS < now - RETENTION_DAYS * 86400:
+                    os.remove(raw)
+                    self.stats["purged"] += 1
+
+    def _run(self):
+        last_compact = 0.0
+        while True:
+            time.sleep(FLUSH_INTERVAL)
+            try:
+                self.flush()
+                if time.time() - last_compact >= ROLLUP_INTERVAL:
+                    last_compact = time.time()
+                    self.compact()
+            except Exception as e:
+                print(f"[DETECÇÕES] Erro na gravação/rollup: {e}")
+
+    def metrics(self):
+        with self.lock:
+            pending = sum(len(p) for p in self.pending)
+        return dict(self.stats, pending=pending, root=self.root)
+
+
+detection_store = DetectionStore()
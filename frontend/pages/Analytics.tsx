@@ -1,9 +1,10 @@
 import React, { useEffect, useState } from 'react';
-import { BarChart, Bar, AreaChart, Area, XAxis, YAxis, CartesianGrid, Tooltip as RechartsTooltip, ResponsiveContainer, PieChart, Pie, Cell } from 'recharts';
+import { BarChart, Bar, AreaChart, Area, LineChart, Line, Legend, XAxis, YAxis, CartesianGrid, Tooltip as RechartsTooltip, ResponsiveContainer, PieChart, Pie, Cell } from 'recharts';
 import { Flame, Activity, PieChart as PieIcon, TrendingUp } from 'lucide-react';
 
 export const Analytics = () => {
   const [data, setData] = useState<any>(null);
+  const [detections, setDetections] = useState<any[]>([]);
 
   useEffect(() => {
     const fetchData = async () => {
@@ -16,6 +17,27 @@ export const Analytics = () => {
         }
     };
     fetchData();
+
+    // Série temporal das detecções (últimas 24h, por hora)
+    const fetchDetections = async () => {
+        try {
+            const res = await fetch('/api/detections/series?resolution=hour');
+            const json = await res.json();
+            const buckets: Record<number, any> = {};
+            for (const p of json.series) {
+                const b = buckets[p.ts] ??= { ts: p.ts, name: `${new Date(p.ts * 1000).getHours().toString().padStart(2, '0')}h`, FOGO: 0, FUMACA: 0, conf: 0, n: 0 };
+                b[p.tag] = (b[p.tag] || 0) + p.count;
+                b.conf += p.conf_mean * p.count;
+                b.n += p.count;
+            }
+            setDetections(Object.values(buckets)
+                .sort((a: any, b: any) => a.ts - b.ts)
+                .map((b: any) => ({ ...b, conf: b.n ? Math.round(b.conf / b.n * 100) : 0 })));
+        } catch (e) {
+            console.error("Failed to fetch detection series", e);
+        }
+    };
+    fetchDetections();
   }, []);
 
   if (!data) return <div className="p-8 text-center text-slate-500">Carregando estatísticas...</div>;
@@ -116,6 +138,35 @@ export const Analytics = () => {
                    </div>
                </div>
            </div>
+
+           {/* Detection Time Series */}
+           <div className="bg-coe-800 border border-coe-700 p-6 rounded-xl lg:col-span-2">
+               <h3 className="text-lg font-bold text-white mb-6 flex items-center gap-2">
+                   <TrendingUp size={20} className="text-coe-accent" />
+                   Detecções da IA (últimas 24h)
+               </h3>
+               <div className="h-64">
+                   {detections.length === 0 ? (
+                       <div className="h-full flex items-center justify-center text-slate-500">Nenhuma detecção registrada no período.</div>
+                   ) : (
+                   <ResponsiveContainer width="100%" height="100%">
+                       <LineChart data={detections}>
+                           <CartesianGrid strokeDasharray="3 3" stroke="#334155" vertical={false} />
+                           <XAxis dataKey="name" stroke="#94a3b8" fontSize={12} tickLine={false} axisLine={false} />
+                           <YAxis yAxisId="count" stroke="#94a3b8" fontSize={12} tickLine={false} axisLine={false} />
+                           <YAxis yAxisId="conf" orientation="right" domain={[0, 100]} unit="%" stroke="#94a3b8" fontSize={12} tickLine={false} axisLine={false} />
+                           <RechartsTooltip 
+                                contentStyle={{ backgroundColor: '#0f172a', borderColor: '#334155', borderRadius: '8px', color: '#fff' }}
+                           />
+                           <Legend />
+                           <Line yAxisId="count" type="monotone" dataKey="FOGO" name="Fogo" stroke="#ef4444" dot={false} />
+                           <Line yAxisId="count" type="monotone" dataKey="FUMACA" name="Fumaça" stroke="#94a3b8" dot={false} />
+                           <Line yAxisId="conf" type="monotone" dataKey="conf" name="Confiança média" stroke="#10b981" strokeDasharray="4 4" dot={false} />
+                       </LineChart>
+                   </ResponsiveContainer>
+                   )}
+               </div>
+           </div>
        </div>
     </div>
   );
@@ -1,24 +1,41 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { MOCK_VEHICLES } from '../constants';
 import { Incident, IncidentPriority, IncidentStatus, Note } from '../types';
 import { suggestResources } from '../services/geminiService';
-import { fetchIncidents, createIncident, updateIncident, deleteIncident, addNote as apiAddNote } from '../services/api';
+import { fetchIncidentPage, createIncident, updateIncident, deleteIncident, addNote as apiAddNote } from '../services/api';
 import { Filter, Search, Plus, MapPin, Ambulance, ChevronRight, MessageSquare, Send, CheckCircle, Trash2, Share2 } from 'lucide-react';
 import { notify } from '../components/Layout';
 
+const PAGE_SIZE = 200; // Abaixo do MAX_PAGE_SIZE do servidor
+const SEARCH_DEBOUNCE_MS = 300;
+
 export const Incidents = () => {
   const [incidents, setIncidents] = useState<Incident[]>([]);
   const [selectedIncident, setSelectedIncident] = useState<Incident | null>(null);
   const [suggestion, setSuggestion] = useState<string | null>(null);
   const [searchTerm, setSearchTerm] = useState('');
   const [filterMode, setFilterMode] = useState<'ALL' | 'ACTIVE'>('ALL');
+  const [pageLimit, setPageLimit] = useState(PAGE_SIZE);
+  const [total, setTotal] = useState(0);
   const [newNote, setNewNote] = useState('');
+  // Filtros em vigor (lidos também pelo polling)
+  const queryRef = useRef({ q: '', active: false, limit: PAGE_SIZE });
 
-  // 1. Fetch Real Data
+  // 1. Fetch Real Data (busca, filtro de ativos e paginação no servidor)
+  // As páginas já abertas ("Carregar mais") são relidas por offset, uma a uma
   const loadData = async () => {
       try {
-          const data = await fetchIncidents();
+          const { q, active, limit } = queryRef.current;
+          let data: Incident[] = [];
+          let count = 0;
+          for (let offset = 0; offset < limit; offset += PAGE_SIZE) {
+              const page = await fetchIncidentPage({ q, active, limit: PAGE_SIZE, offset });
+              data = data.concat(page.items);
+              count = page.total;
+              if (page.items.length < PAGE_SIZE) break;
+          }
           setIncidents(data);
+          setTotal(count);
           
           // Update selected if exists
           if (selectedIncident) {
@@ -31,11 +48,21 @@ export const Incidents = () => {
   };
 
   useEffect(() => {
-      loadData();
       const interval = setInterval(loadData, 3000); // Poll every 3s
       return () => clearInterval(interval);
   }, []);
 
+  // Carga inicial e troca de filtro/página vão direto; a digitação espera uma pausa
+  useEffect(() => {
+      const q = searchTerm.trim();
+      const delay = q === queryRef.current.q ? 0 : SEARCH_DEBOUNCE_MS;
+      const timer = setTimeout(() => {
+          queryRef.current = { q, active: filterMode === 'ACTIVE', limit: pageLimit };
+          loadData();
+      }, delay);
+      return () => clearTimeout(timer);
+  }, [searchTerm, filterMode, pageLimit]);
+
   // 2. WhatsApp Integration
   const handleShare = (inc: Incident) => {
       const text = `🚨 *ALERTA COE* 🚨\n\n*Tipo:* ${inc.type}\n*Prioridade:* ${inc.priority}\n*Status:* ${inc.status}\n*Local:* ${inc.address}\n\n📍 *Coords:* https://maps.google.com/?q=${inc.location.lat},${inc.location.lon}`;
@@ -56,14 +83,9 @@ export const Incidents = () => {
 
   // ... rest of logic updated to use API ...
 
-  // Search Logic
-  const filteredIncidents = incidents.filter(inc => {
-    const matchesSearch = inc.type.toLowerCase().includes(searchTerm.toLowerCase()) || 
-                          inc.address.toLowerCase().includes(searchTerm.toLowerCase()) ||
-                          inc.id.toLowerCase().includes(searchTerm.toLowerCase());
-    const matchesFilter = filterMode === 'ALL' ? true : (inc.status !== IncidentStatus.RESOLVED && inc.status !== IncidentStatus.CLOSED);
-    return matchesSearch && matchesFilter;
-  });
+  // Busca e filtro de ativos já aplicados pelo servidor
+  const filteredIncidents = incidents;
+  const hasMore = incidents.length < total;
 
   const handleSuggest = async (inc: Incident) => {
       notify("Consultando IA...", "info");
@@ -146,7 +168,7 @@ export const Incidents = () => {
               <input 
                 type="text" 
                 value={searchTerm}
-                onChange={(e) => setSearchTerm(e.target.value)}
+                onChange={(e) => { setSearchTerm(e.target.value); setPageLimit(PAGE_SIZE); }}
                 placeholder="Buscar por ID, endereço ou tipo..." 
                 className="w-full bg-coe-900 border border-coe-700 text-slate-200 text-sm rounded-lg pl-9 pr-4 py-2 focus:outline-none focus:border-coe-accent"
               />
@@ -154,6 +176,7 @@ export const Incidents = () => {
             <button 
                 onClick={() => {
                     setFilterMode(prev => prev === 'ALL' ? 'ACTIVE' : 'ALL');
+                    setPageLimit(PAGE_SIZE);
                     notify(filterMode === 'ALL' ? "Filtrando: Apenas Ativos" : "Filtrando: Todos", "info");
                 }}
                 className={`p-2 border rounded-lg transition-colors ${filterMode === 'ACTIVE' ? 'bg-coe-accent text-white border-coe-accent' : 'bg-coe-900 border-coe-700 text-slate-400 hover:text-white'}`}
@@ -203,6 +226,14 @@ export const Incidents = () => {
                 </div>
               ))
           )}
+          {hasMore && (
+             <button
+                onClick={() => setPageLimit(prev => prev + PAGE_SIZE)}
+                className="w-full p-3 text-sm text-slate-400 hover:text-white hover:bg-coe-700/50 transition-colors"
+             >
+                Carregar mais
+             </button>
+          )}
         </div>
       </div>
 
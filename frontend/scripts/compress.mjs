@@ -0,0 +1,48 @@
+// Gera variantes .br e .gz dos arquivos de texto do build (dist/),
+// servidas pelo Flask conforme o Accept-Encoding do navegador.
+// Uso: node scripts/compress.mjs [pasta]   (padrão: dist)
+import { readdir, readFile, writeFile, unlink } from 'node:fs/promises';
+import { join, extname } from 'node:path';
+import { brotliCompressSync, gzipSync, constants } from 'node:zlib';
+
+const COMPRESSIBLE = new Set(['.js', '.mjs', '.css', '.html', '.svg', '.json', '.map', '.txt', '.wasm']);
+const MIN_SIZE = 1024; // Abaixo disso o ganho não compensa o header extra
+
+const walk = async (dir) => {
+  const files = [];
+  for (const entry of await readdir(dir, { withFileTypes: true })) {
+    const path = join(dir, entry.name);
+    if (entry.isDirectory()) files.push(...await walk(path));
+    else files.push(path);
+  }
+  return files;
+};
+
+const root = process.argv[2] || 'dist';
+let original = 0, brotli = 0, gzip = 0, count = 0;
+
+for (const file of await walk(root)) {
+  if (!COMPRESSIBLE.has(extname(file))) continue;
+  const data = await readFile(file);
+  if (data.length < MIN_SIZE) continue;
+
+  const variants = [
+    ['.br', brotliCompressSync(data, { params: {
+      [constants.BROTLI_PARAM_QUALITY]: constants.BROTLI_MAX_QUALITY,
+      [constants.BROTLI_PARAM_SIZE_HINT]: data.length,
+    } })],
+    ['.gz', gzipSync(data, { level: constants.Z_BEST_COMPRESSION })],
+  ];
+  for (const [suffix, compressed] of variants) {
+    // Só grava se for menor que o original (e remove variante antiga inútil)
+    if (compressed.length < data.length) await writeFile(file + suffix, compressed);
+    else await unlink(file + suffix).catch(() => {});
+  }
+  original += data.length;
+  brotli += Math.min(variants[0][1].length, data.length);
+  gzip += Math.min(variants[1][1].length, data.length);
+  count++;
+}
+
+const kb = (n) => (n / 1024).toFixed(1) + ' KB';
+console.log(`[compress] ${count} arquivos: ${kb(original)} -> br ${kb(brotli)}, gzip ${kb(gzip)}`);
@@ -1,10 +1,40 @@
 import { Incident } from '../types';
 
-export const fetchIncidents = async (): Promise<Incident[]> => {
-    const res = await fetch('/api/incidents');
+export interface IncidentQuery {
+    status?: string;
+    tag?: string;
+    priority?: string;
+    start?: string;
+    end?: string;
+    q?: string;
+    active?: boolean;
+    limit?: number;
+    offset?: number;
+}
+
+const incidentParams = (query: IncidentQuery): string => {
+    const params = new URLSearchParams();
+    Object.entries(query).forEach(([key, value]) => {
+        if (value === undefined || value === '' || value === false) return;
+        params.set(key, value === true ? '1' : String(value));
+    });
+    return params.toString();
+};
+
+export const fetchIncidents = async (query: IncidentQuery = {}): Promise<Incident[]> => {
+    const qs = incidentParams(query);
+    const res = await fetch(qs ? `/api/incidents?${qs}` : '/api/incidents');
     return res.json();
 };
 
+// Uma página e o total que casa com os filtros (header X-Total-Count)
+export const fetchIncidentPage = async (query: IncidentQuery): Promise<{ items: Incident[]; total: number }> => {
+    const res = await fetch(`/api/incidents?${incidentParams(query)}`);
+    const items: Incident[] = await res.json();
+    const total = Number(res.headers.get('X-Total-Count') ?? items.length);
+    return { items, total };
+};
+
 export const createIncident = async (data: Partial<Incident>): Promise<Incident> => {
     const res = await fetch('/api/incidents', {
         method: 'POST',
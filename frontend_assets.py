@@ -0,0 +1,117 @@
+"""
+Entrega do build do frontend (frontend/dist) com compressão e cache HTTP.
+
+Assets com hash no nome (gerados pelo Vite) nunca mudam: vão com Cache-Control
+imutável de 1 ano e, se existir, na variante .br/.gz criada no build
+(frontend/scripts/compress.mjs), escolhida pelo Accept-Encoding do navegador.
+O index.html fica em memória (já comprimido) e é revalidado por ETag, então
+visitas repetidas custam no máximo um 304.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import stat
+import threading
+
+from flask import Response, abort, request, send_file
+from werkzeug.security import safe_join
+
+# === Configurações ===
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache" # Pode guardar, mas confirma o ETag a cada uso
+ENCODINGS = (("br", ".br"), ("gzip", ".gz")) # Ordem de preferência do servidor
+
+# Nome com hash do Vite: index-BkX4c_9a.js, logo-Dq3f-1Zx.svg ...
+HASHED_NAME = re.compile(r"-[A-Za-z0-9_-]{8,}\.[A-Za-z0-9]+$")
+
+
+def _accepted_encodings():
+    """Variantes aceitas pelo cliente, na ordem de preferência; '' = sem compressão."""
+    accepted = [(enc, suffix) for enc, suffix in ENCODINGS if request.accept_encodings[enc] > 0]
+    return accepted + [("", "")]
+
+
+class FrontendAssets:
+    """Substitui o handler estático padrão do Flask para /assets e serve o index.html."""
+
+    def __init__(self, app=None):
+        self.lock = threading.Lock()
+        self.index_page = None  # (mtime, {encoding: bytes}, etag)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.assets_dir = app.static_folder
+        self.index_path = os.path.join(app.root_path, app.template_folder, "index.html")
+        # Mantém url_for('static') e a pasta usada pelos snapshots
+        app.view_functions["static"] = self.serve_asset
+
+    # --- /assets/<arquivo> ---
+    def serve_asset(self, filename):
+        path = safe_join(self.assets_dir, filename)
+        if path is None:
+            abort(404)
+
+        for encoding, suffix in _accepted_encodings():
+            try:
+                st = os.stat(path + suffix)
+            except OSError:
+                continue
+            if stat.S_ISREG(st.st_mode):
+                break
+        else:
+            abort(404)
+
+        response = send_file(path + suffix,
+                             mimetype=mimetypes.guess_type(path)[0] or "application/octet-stream",
+                             conditional=True,
+                             etag=f"{st.st_mtime_ns:x}-{st.st_size:x}-{encoding or 'identity'}",
+                             last_modified=st.st_mtime)
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+        response.headers["Vary"] = "Accept-Encoding"
+        # Snapshots e arquivos sem hash podem mudar: só revalidação
+        response.headers["Cache-Control"] = IMMUTABLE_CACHE if HASHED_NAME.search(filename) else REVALIDATE_CACHE
+        return response
+
+    # --- index.html (rotas do React Router) ---
+    def _load_index(self):
+        """Recarrega o index.html (e variantes do build) só quando o arquivo muda."""
+        try:
+            mtime = os.path.getmtime(self.index_path)
+        except OSError:
+            return None
+        page = self.index_page
+        if page is not None and page[0] == mtime:
+            return page
+
+        with self.lock:
+            with open(self.index_path, "rb") as f:
+                html = f.read()
+            bodies = {"": html}
+            for encoding, suffix in ENCODINGS:
+                variant = self.index_path + suffix
+                if os.path.exists(variant) and os.path.getmtime(variant) >= mtime:
+                    with open(variant, "rb") as f:
+                        bodies[encoding] = f.read()
+            if "gzip" not in bodies:
+                bodies["gzip"] = gzip.compress(html, 9)
+            self.index_page = (mtime, bodies, hashlib.blake2b(html, digest_size=8).hexdigest())
+            return self.index_page
+
+    def index(self):
+        page = self._load_index()
+        if page is None:
+            return "Frontend não compilado (cd frontend && npm run build)", 404
+        _, bodies, etag = page
+
+        encoding = next(enc for enc, _ in _accepted_encodings() if enc in bodies)
+        response = Response(bodies[encoding], mimetype="text/html")
+        response.set_etag(f"{etag}-{encoding or 'identity'}")
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+        response.headers["Vary"] = "Accept-Encoding"
+        response.headers["Cache-Control"] = REVALIDATE_CACHE
+        return response.make_conditional(request)
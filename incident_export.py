@@ -0,0 +1,117 @@
+import csv
+import io
+import json
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError: # Parquet é opcional
+    pa = None
+    pq = None
+
+EXPORT_COLUMNS = ["id", "type", "tag", "priority", "status", "address", "description",
+                  "timestamp", "lat", "lon", "confidence", "detections", "last_seen", "notes"]
+
+CHUNK_ROWS = 1000 # Linhas por bloco enviado ao cliente
+
+FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+
+def _flat(inc):
+    """Incidente no formato de get_all() -> linha plana para exportação."""
+    row = {k: inc.get(k) for k in EXPORT_COLUMNS}
+    row["notes"] = json.dumps(inc.get("notes") or [], ensure_ascii=False)
+    return row
+
+
+def _chunks(rows, size=CHUNK_ROWS):
+    chunk = []
+    for row in rows:
+        chunk.append(_flat(row))
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def stream_csv(rows):
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=EXPORT_COLUMNS)
+    writer.writeheader()
+    for chunk in _chunks(rows):
+        writer.writerows(chunk)
+        yield buf.getvalue().encode("utf-8")
+        buf.seek(0)
+        buf.truncate()
+    tail = buf.getvalue()
+    if tail:
+        yield tail.encode("utf-8")
+
+
+def stream_ndjson(rows):
+    for chunk in _chunks(rows):
+        yield "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in chunk).encode("utf-8")
+
+
+class _DrainSink(io.RawIOBase):
+    """Arquivo de escrita que só acumula bytes até serem drenados pelo gerador."""
+
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        data = bytes(data)
+        self.parts.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data = b"".join(self.parts)
+        self.parts = []
+        return data
+
+
+def parquet_available():
+    return pa is not None
+
+
+def stream_parquet(rows):
+    """Um row group por bloco; cada bloco é enviado assim que escrito."""
+    schema = pa.schema([
+        ("id", pa.string()), ("type", pa.string()), ("tag", pa.string()),
+        ("priority", pa.string()), ("status", pa.string()), ("address", pa.string()),
+        ("description", pa.string()), ("timestamp", pa.string()),
+        ("lat", pa.float64()), ("lon", pa.float64()), ("confidence", pa.float64()),
+        ("detections", pa.int64()), ("last_seen", pa.string()), ("notes", pa.string()),
+    ])
+    sink = _DrainSink()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        for chunk in _chunks(rows):
+            writer.write_table(pa.Table.from_pylist(chunk, schema=schema))
+            data = sink.drain()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def stream_export(fmt, rows):
+    if fmt == "csv":
+        return stream_csv(rows)
+    if fmt == "ndjson":
+        return stream_ndjson(rows)
+    return stream_parquet(rows)
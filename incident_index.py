@@ -0,0 +1,167 @@
+import math
+import threading
+import time
+
+# === Configurações ===
+CELL_SIZE = 2.0          # Tamanho da célula da grade (metros)
+MERGE_RADIUS = 1.5       # Distância máxima para considerar o mesmo incidente (metros)
+INCIDENT_TIMEOUT = 120.0 # Segundos sem detecção até o incidente ser fechado
+FLUSH_INTERVAL = 10.0    # Intervalo mínimo entre escritas no banco por incidente
+
+
+class ActiveIncident:
+    """Estado em memória de um incidente aberto (ainda recebendo detecções)."""
+
+    def __init__(self, incident_id, tag, x, y, conf, now):
+        self.id = incident_id
+        self.tag = tag
+        self.x = x
+        self.y = y
+        self.conf = conf
+        self.extent = [x, y, x, y] # [min_x, min_y, max_x, max_y]
+        self.detections = 1
+        self.first_seen = now
+        self.last_seen = now
+        self.last_flush = now
+        self.dirty = False
+        self.cell = None
+        self.track_ids = set()
+
+    def update(self, x, y, conf, now):
+        self.x = x
+        self.y = y
+        self.conf = max(self.conf, conf)
+        self.extent = [min(self.extent[0], x), min(self.extent[1], y),
+                       max(self.extent[2], x), max(self.extent[3], y)]
+        self.detections += 1
+        self.last_seen = now
+        self.dirty = True
+
+    def snapshot(self):
+        """Campos persistidos no banco (ver IncidentManager.touch_incident)."""
+        return {
+            "confidence": self.conf,
+            "extent": list(self.extent),
+            "detections": self.detections,
+            "last_seen": self.last_seen
+        }
+
+
+class IncidentSpatialIndex:
+    """
+    Grid hash das coordenadas reais (homografia) dos incidentes abertos.
+
+    Cada célula guarda os incidentes cuja última posição caiu nela; a busca
+    olha só a vizinhança 3x3, então o custo não depende do número de
+    incidentes abertos.
+    """
+
+    def __init__(self, cell_size=CELL_SIZE, radius=MERGE_RADIUS, timeout=INCIDENT_TIMEOUT):
+        self.cell_size = cell_size
+        self.radius = radius
+        self.timeout = timeout
+        self.cells = {}   # (tag, cx, cy) -> {incident_id: ActiveIncident}
+        self.active = {}  # incident_id -> ActiveIncident
+        self.tracks = {}  # track_id -> incident_id
+        self.lock = threading.Lock()
+
+    def _cell(self, x, y):
+        return (int(math.floor(x / self.cell_size)), int(math.floor(y / self.cell_size)))
+
+    def _place(self, inc):
+        cx, cy = self._cell(inc.x, inc.y)
+        key = (inc.tag, cx, cy)
+        if inc.cell == key:
+            return
+        self._unplace(inc)
+        self.cells.setdefault(key, {})[inc.id] = inc
+        inc.cell = key
+
+    def _unplace(self, inc):
+        if inc.cell is None:
+            return
+        bucket = self.cells.get(inc.cell)
+        if bucket is not None:
+            bucket.pop(inc.id, None)
+            if not bucket:
+                del self.cells[inc.cell]
+        inc.cell = None
+
+    def _link_track(self, inc, track_id):
+        if track_id is None:
+            return
+        self.tracks[track_id] = inc.id
+        inc.track_ids.add(track_id)
+
+    def _drop(self, inc):
+        del self.active[inc.id]
+        self._unplace(inc)
+        for track_id in inc.track_ids:
+            self.tracks.pop(track_id, None)
+
+    def find(self, tag, x, y, track_id=None):
+        """
+        Retorna o incidente aberto da mesma track ou, senão, o mais próximo
+        dentro do raio. None se não houver.
+        """
+        cx, cy = self._cell(x, y)
+        best, best_dist = None, self.radius
+        with self.lock:
+            linked = self.active.get(self.tracks.get(track_id))
+            if linked is not None and linked.tag == tag:
+                return linked
+            for dx in (-1, 0, 1):
+                for dy in (-1, 0, 1):
+                    bucket = self.cells.get((tag, cx + dx, cy + dy))
+                    if not bucket:
+                        continue
+                    for inc in bucket.values():
+                        dist = math.hypot(inc.x - x, inc.y - y)
+                        if dist <= best_dist:
+                            best, best_dist = inc, dist
+        return best
+
+    def add(self, incident_id, tag, x, y, conf, now=None, track_id=None):
+        now = time.time() if now is None else now
+        inc = ActiveIncident(incident_id, tag, x, y, conf, now)
+        with self.lock:
+            self.active[incident_id] = inc
+            self._place(inc)
+            self._link_track(inc, track_id)
+        return inc
+
+    def update(self, inc, x, y, conf, now=None, track_id=None):
+        now = time.time() if now is None else now
+        with self.lock:
+            inc.update(x, y, conf, now)
+            self._place(inc)
+            self._link_track(inc, track_id)
+        return inc
+
+    def remove(self, incident_id):
+        with self.lock:
+            inc = self.active.get(incident_id)
+            if inc is not None:
+                self._drop(inc)
+        return inc
+
+    def expire(self, now=None):
+        """Remove incidentes sem detecção há mais de `timeout` e os retorna."""
+        now = time.time() if now is None else now
+        expired = []
+        with self.lock:
+            for inc in list(self.active.values()):
+                if now - inc.last_seen > self.timeout:
+                    self._drop(inc)
+                    expired.append(inc)
+        return expired
+
+    def due_for_flush(self, now=None, interval=FLUSH_INTERVAL):
+        """Incidentes com alterações pendentes há mais de `interval` segundos."""
+        now = time.time() if now is None else now
+        with self.lock:
+            return [inc for inc in self.active.values()
+                    if inc.dirty and now - inc.last_flush >= interval]
+
+    def __len__(self):
+        return len(self.active)
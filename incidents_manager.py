@@ -1,19 +1,64 @@
 import datetime
+import heapq
+import itertools
+import os
 import uuid
 import sqlite3
 import json
+import re
+import threading
+import time
 import urllib.request
 
+# Caminho do banco (sobrescrevível para benchmarks/testes de carga)
+DB_PATH = os.environ.get("INCIDENTS_DB", "incidents.db")
+
+# Arquivo morto: incidentes resolvidos/antigos saem do banco quente para um
+# SQLite por mês (incidents_AAAA_MM.db), aberto só em consultas históricas.
+# Padrão: pasta incidents_archive/ ao lado do banco.
+ARCHIVE_DIR = os.environ.get("INCIDENTS_ARCHIVE_DIR")
+RESOLVED_GRACE_DAYS = 7    # Encerrados (CLOSED_STATUSES) continuam no banco quente por N dias
+ARCHIVE_AFTER_DAYS = 90    # Qualquer status: arquivado após N dias
+ARCHIVE_BATCH = 500        # Incidentes por lote (lock de escrita curto)
+ARCHIVE_INTERVAL = 3600.0  # Segundos entre compactações
+ARCHIVE_PAUSE = 0.05       # Pausa entre lotes (deixa os INSERTs ao vivo passarem)
+ARCHIVE_CACHE_ENTRIES = 512 # Contagens do arquivo morto guardadas (ver _archive_query)
+ARCHIVE_NAME = re.compile(r"^incidents_(\d{4})_(\d{2})\.db$")
+
+# Status de incidente encerrado pelo operador (o frontend usa Encerrado/Fechado)
+CLOSED_STATUSES = ('Resolvido', 'Encerrado', 'Fechado')
+
+# Texto indexado das notas: autor + conteúdo de cada nota do JSON
+_FTS_NOTES_SQL = "(SELECT group_concat(json_extract(value, '$.author') || ' ' || json_extract(value, '$.content'), ' ') FROM json_each(COALESCE(new.notes, '[]')))"
+
+def _truthy(value):
+    """Flag de query string (?active=1, ?archive=true)."""
+    return str(value or '').lower() in ('1', 'true', 'sim')
+
 class IncidentManager:
-    def __init__(self, db_path="incidents.db"):
+    def __init__(self, db_path=DB_PATH, archive_dir=ARCHIVE_DIR):
         self.db_path = db_path
+        self.archive_dir = archive_dir or os.path.join(os.path.dirname(db_path), "incidents_archive")
+        self.archive_lock = threading.Lock()
+        self.archiver = None
+        self._archive_cache = {} # (caminho, sql, parâmetros) -> (mtime, tamanho, linhas)
         self._init_db()
 
     def _init_db(self):
         """Inicializa o banco de dados SQLite."""
         conn = sqlite3.connect(self.db_path)
         c = conn.cursor()
-        
+
+        # WAL: leituras longas (exportação) não bloqueiam os INSERTs da inferência
+        c.execute("PRAGMA journal_mode=WAL")
+        self.fts = self._create_schema(c)
+        self._init_archived_ids(c)
+
+        conn.commit()
+        conn.close()
+
+    def _create_schema(self, c):
+        """Tabela, índices e FTS (mesmo esquema no banco quente e nos arquivos mensais)."""
         # Tabela de Incidentes
         c.execute('''CREATE TABLE IF NOT EXISTS incidents (
             id TEXT PRIMARY KEY,
@@ -28,9 +73,76 @@ class IncidentManager:
             lon REAL,
             notes TEXT
         )''')
-        
-        conn.commit()
-        conn.close()
+
+        # Migração: colunas de agregação de detecções (incidentes automáticos)
+        existing = {row[1] for row in c.execute("PRAGMA table_info(incidents)")}
+        for column, decl in [("confidence", "REAL"), ("extent", "TEXT"),
+                             ("detections", "INTEGER DEFAULT 1"), ("last_seen", "TEXT")]:
+            if column not in existing:
+                c.execute(f"ALTER TABLE incidents ADD COLUMN {column} {decl}")
+
+        # Índices compostos para os filtros da API (filtro + ordenação por data)
+        c.execute("CREATE INDEX IF NOT EXISTS idx_incidents_timestamp ON incidents(timestamp)")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_incidents_status_ts ON incidents(status, timestamp)")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_incidents_tag_ts ON incidents(tag, timestamp)")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_incidents_priority_ts ON incidents(priority, timestamp)")
+
+        return self._init_fts(c)
+
+    def _init_fts(self, c):
+        """
+        Busca textual (FTS5) sobre type, address, description e notas.
+        Triggers mantêm o índice em sincronia com create/update/add_note/delete.
+        Retorna False se o SQLite não tiver FTS5 (a busca cai para LIKE).
+        """
+        try:
+            c.execute('''CREATE VIRTUAL TABLE IF NOT EXISTS incidents_fts
+                         USING fts5(type, address, description, notes)''')
+        except sqlite3.OperationalError as e:
+            print(f"[DB] FTS5 indisponível ({e}). Busca textual via LIKE.")
+            return False
+
+        c.execute(f'''CREATE TRIGGER IF NOT EXISTS incidents_fts_insert AFTER INSERT ON incidents BEGIN
+                        INSERT INTO incidents_fts(rowid, type, address, description, notes)
+                        VALUES (new.rowid, new.type, new.address, new.description, {_FTS_NOTES_SQL});
+                      END''')
+        c.execute(f'''CREATE TRIGGER IF NOT EXISTS incidents_fts_update
+                      AFTER UPDATE OF type, address, description, notes ON incidents BEGIN
+                        DELETE FROM incidents_fts WHERE rowid = old.rowid;
+                        INSERT INTO incidents_fts(rowid, type, address, description, notes)
+                        VALUES (new.rowid, new.type, new.address, new.description, {_FTS_NOTES_SQL});
+                      END''')
+        c.execute('''CREATE TRIGGER IF NOT EXISTS incidents_fts_delete AFTER DELETE ON incidents BEGIN
+                        DELETE FROM incidents_fts WHERE rowid = old.rowid;
+                     END''')
+
+        # Bancos anteriores ao FTS: indexa o que já existe
+        indexed = c.execute("SELECT COUNT(*) FROM incidents_fts").fetchone()[0]
+        if indexed == 0:
+            c.execute(f'''INSERT INTO incidents_fts(rowid, type, address, description, notes)
+                          SELECT new.rowid, new.type, new.address, new.description, {_FTS_NOTES_SQL}
+                          FROM incidents AS new''')
+        return True
+
+    def _init_archived_ids(self, c):
+        """
+        Índice ID -> mês dos incidentes arquivados (só no banco quente).
+        Edições e reenvios da borda acham o arquivo mensal com uma busca pela
+        chave, sem abrir cada arquivo. Bancos anteriores ao índice são
+        preenchidos uma vez a partir dos arquivos existentes.
+        """
+        exists = c.execute("SELECT 1 FROM sqlite_master WHERE name = 'archived_ids'").fetchone()
+        c.execute('''CREATE TABLE IF NOT EXISTS archived_ids (
+            id TEXT PRIMARY KEY,
+            month TEXT NOT NULL
+        ) WITHOUT ROWID''')
+        if exists:
+            return
+        for month in self._archive_months():
+            conn = self._read_only(self._archive_path(month))
+            ids = [(row[0], month) for row in conn.execute("SELECT id FROM incidents")]
+            conn.close()
+            c.executemany("INSERT OR REPLACE INTO archived_ids (id, month) VALUES (?, ?)", ids)
 
     def _get_auto_location(self):
         """Obtém localização aproximada via IP (Fallback)."""
@@ -43,8 +155,55 @@ class IncidentManager:
             print(f"[LOCATION] Erro ao obter localização: {e}")
         return -23.5505, -46.6333 # Default SP
 
+    @staticmethod
+    def _row_to_incident(row):
+        inc = dict(row)
+        # Reconstrói objeto 'location' e 'notes'
+        inc['location'] = {'lat': inc['lat'], 'lon': inc['lon']}
+        inc['notes'] = json.loads(inc['notes']) if inc['notes'] else []
+        inc['extent'] = json.loads(inc['extent']) if inc['extent'] else None
+        # Remove campos chatos de duplicar se quiser, mas o frontend espera estrutura flat as vezes? 
+        # O frontend espera 'location' aninhado.
+        return inc
+
+    @staticmethod
+    def _fts_query(text):
+        """Converte texto livre em consulta FTS5 segura (prefixo em cada termo)."""
+        terms = re.findall(r"\w+", text, re.UNICODE)
+        return " ".join(f'"{t}"*' for t in terms)
+
+    def _where(self, filters):
+        """Monta a cláusula WHERE (e parâmetros) a partir dos filtros da API."""
+        clauses = []
+        params = []
+        if filters.get('start'):
+            clauses.append("timestamp >= ?")
+            params.append(filters['start'])
+        if filters.get('end'):
+            clauses.append("timestamp < ?")
+            params.append(filters['end'])
+        for field in ('tag', 'status', 'priority'):
+            if filters.get(field):
+                clauses.append(f"{field} = ?")
+                params.append(filters[field])
+        if _truthy(filters.get('active')):
+            clauses.append(f"COALESCE(status, '') NOT IN ({', '.join('?' * len(CLOSED_STATUSES))})")
+            params.extend(CLOSED_STATUSES)
+        if filters.get('q'):
+            # Trecho do ID (ex: 3F2A para INC-3F2A1B) também casa com a busca
+            id_like = "%" + re.sub(r"([\\%_])", r"\\\1", filters['q'].strip()) + "%"
+            if self.fts:
+                clauses.append("(id LIKE ? ESCAPE '\\' OR rowid IN (SELECT rowid FROM incidents_fts WHERE incidents_fts MATCH ?))")
+                params.extend([id_like, self._fts_query(filters['q']) or '""'])
+            else:
+                clauses.append("(id LIKE ? ESCAPE '\\' OR type LIKE ? OR address LIKE ? OR description LIKE ? OR notes LIKE ?)")
+                params.append(id_like)
+                params.extend([f"%{filters['q']}%"] * 4)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return where, params
+
     def get_all(self):
-        """Retorna todos os incidentes ordenados por data."""
+        """Retorna todos os incidentes do banco quente ordenados por data."""
         conn = sqlite3.connect(self.db_path)
         # Row factory para retornar dicionários compatíveis com o frontend
         conn.row_factory = sqlite3.Row
@@ -53,39 +212,144 @@ class IncidentManager:
         c.execute("SELECT * FROM incidents ORDER BY timestamp DESC")
         rows = c.fetchall()
         
-        incidents = []
-        for row in rows:
-            inc = dict(row)
-            # Reconstrói objeto 'location' e 'notes'
-            inc['location'] = {'lat': inc['lat'], 'lon': inc['lon']}
-            inc['notes'] = json.loads(inc['notes']) if inc['notes'] else []
-            # Remove campos chatos de duplicar se quiser, mas o frontend espera estrutura flat as vezes? 
-            # O frontend espera 'location' aninhado.
-            incidents.append(inc)
+        incidents = [self._row_to_incident(row) for row in rows]
             
         conn.close()
         return incidents
 
-    def create_incident(self, type, tag, priority, address, description, status="Novo"):
+    def _sources(self, filters, history=False, now=None):
+        """
+        Bancos que uma consulta precisa ler. A listagem padrão (sem start/end)
+        lê só o banco quente, então o polling do painel não depende do tamanho
+        do histórico. Os arquivos mensais do intervalo entram em consultas
+        históricas: archive=1, end definido, start anterior à janela que só o
+        banco quente cobre, ou history=True (exportações).
+        """
+        paths = [self.db_path]
+        start = filters.get('start') or ''
+        end = filters.get('end') or ''
+        now = now or datetime.datetime.now()
+        if not (history or _truthy(filters.get('archive')) or end or
+                (start and start < (now - datetime.timedelta(days=RESOLVED_GRACE_DAYS)).isoformat())):
+            return paths
+        for month in self._archive_months():
+            if (not start or month >= start[:7]) and (not end or month <= end[:7]):
+                paths.append(self._archive_path(month))
+        return paths
+
+    @staticmethod
+    def _read_only(path):
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @staticmethod
+    def _fetch_chunks(cursor, chunk_size):
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                return
+            yield from rows
+
+    def _iter_rows(self, filters, sources, limit=None, chunk_size=1000):
+        """
+        Linhas que casam com os filtros em todos os `sources`, mais recentes
+        primeiro: cada banco já devolve em ordem e heapq.merge intercala os
+        cursores sem carregar tudo na memória.
+        """
+        where, params = self._where(filters)
+        sql = f"SELECT * FROM incidents {where} ORDER BY timestamp DESC"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        conns = []
+        try:
+            cursors = []
+            for path in sources:
+                conn = self._read_only(path)
+                conns.append(conn)
+                cursors.append(self._fetch_chunks(conn.execute(sql, params), chunk_size))
+            if len(cursors) == 1:
+                yield from cursors[0]
+            else:
+                yield from heapq.merge(*cursors, key=lambda row: row['timestamp'] or '', reverse=True)
+        finally:
+            for conn in conns:
+                conn.close()
+
+    def query_incidents(self, filters=None, limit=None, offset=0):
+        """
+        Incidentes filtrados e paginados (mais recentes primeiro).
+        Retorna (itens da página, total que casa com os filtros).
+        Só consultas históricas incluem o arquivo morto (ver _sources).
+        """
+        filters = filters or {}
+        sources = self._sources(filters)
+        where, params = self._where(filters)
+
+        count_sql = f"SELECT COUNT(*) FROM incidents {where}"
+        conn = self._read_only(self.db_path)
+        total = conn.execute(count_sql, params).fetchone()[0]
+        conn.close()
+        for path in sources[1:]:
+            total += self._archive_query(path, count_sql, params)[0][0]
+
+        # Cada banco devolve no máximo offset + limit linhas; a página sai da intercalação
+        stop = None if limit is None else offset + limit
+        rows = self._iter_rows(filters, sources, limit=stop)
+        try:
+            items = [self._row_to_incident(row) for row in itertools.islice(rows, offset, stop)]
+        finally:
+            rows.close()
+        return items, total
+
+    def iter_incidents(self, filters=None, chunk_size=1000):
+        """
+        Gera os incidentes filtrados direto do cursor, em blocos de `chunk_size`.
+        Memória constante e conexões somente leitura (não seguram lock de escrita).
+        Exportações sempre intercalam banco quente e arquivo morto (meses do intervalo).
+        """
+        filters = filters or {}
+        for row in self._iter_rows(filters, self._sources(filters, history=True), chunk_size=chunk_size):
+            yield self._row_to_incident(row)
+
+    def create_incident(self, type, tag, priority, address, description, status="Novo",
+                        confidence=None, extent=None, incident_id=None, timestamp=None, location=None):
+        """
+        incident_id/timestamp/location vêm de outra instância (ex: agente de borda
+        via /api/ingest). Com incident_id já existente (reenvio), nada é alterado
+        e o retorno é None.
+        """
         # Auto-Location se não fornecido (aqui assume-se que camera passará coord 0,0 se desconhecido)
         # Se address contiver "Camera 01" e coordenadas forem dummy, tentamos pegar reais.
         
-        lat, lon = self._get_auto_location()
+        lat, lon = location if location is not None else self._get_auto_location()
         
-        new_id = f"INC-{str(uuid.uuid4())[:6].upper()}"
-        timestamp = datetime.datetime.now().isoformat()
+        new_id = incident_id or f"INC-{str(uuid.uuid4())[:6].upper()}"
+        timestamp = timestamp or datetime.datetime.now().isoformat()
         notes_json = json.dumps([])
+        extent_json = json.dumps(extent) if extent is not None else None
         
+        # ID externo já arquivado: reenvio tardio de um lote (não reinsere no banco quente)
+        if incident_id and self._archived_path(incident_id) is not None:
+            return None
+
         conn = sqlite3.connect(self.db_path)
         c = conn.cursor()
         
-        c.execute('''INSERT INTO incidents 
-                     (id, type, tag, priority, status, address, description, timestamp, lat, lon, notes)
-                     VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
-                  (new_id, type, tag, priority, status, address, description, timestamp, lat, lon, notes_json))
+        # ID externo: reenvio do mesmo incidente é ignorado (idempotente)
+        verb = "INSERT OR IGNORE" if incident_id else "INSERT"
+        c.execute(f'''{verb} INTO incidents 
+                     (id, type, tag, priority, status, address, description, timestamp, lat, lon, notes,
+                      confidence, extent, detections, last_seen)
+                     VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1, ?)''',
+                  (new_id, type, tag, priority, status, address, description, timestamp, lat, lon, notes_json,
+                   confidence, extent_json, timestamp))
+        created = c.rowcount > 0
         
         conn.commit()
         conn.close()
+        if not created:
+            return None
         
         # Retorna formato para o frontend
         return {
@@ -98,7 +362,11 @@ class IncidentManager:
             "location": {"lat": lat, "lon": lon},
             "description": description,
             "timestamp": timestamp,
-            "notes": []
+            "notes": [],
+            "confidence": confidence,
+            "extent": extent,
+            "detections": 1,
+            "last_seen": timestamp
         }
 
     def update_incident(self, id, data):
@@ -118,53 +386,127 @@ class IncidentManager:
             return None
             
         values.append(id)
-        c.execute(f"UPDATE incidents SET {', '.join(fields)} WHERE id = ?", values)
+        sql = f"UPDATE incidents SET {', '.join(fields)} WHERE id = ?"
+        c.execute(sql, values)
+        found = c.rowcount > 0
         conn.commit()
         conn.close()
+
+        # Incidente já arquivado: a edição vai para o arquivo do mês
+        if not found:
+            path = self._archived_path(id)
+            if path is not None:
+                conn = sqlite3.connect(path)
+                conn.execute(sql, values)
+                conn.commit()
+                conn.close()
         return True
 
+    def touch_incident(self, id, confidence, extent, detections, last_seen):
+        """
+        Atualiza a agregação de detecções de um incidente aberto (sem criar nova linha).
+        Retorna False se o incidente não existe mais ou já foi encerrado pelo operador.
+        """
+        closed = ", ".join("?" * len(CLOSED_STATUSES))
+        conn = sqlite3.connect(self.db_path)
+        c = conn.cursor()
+        c.execute(f'''UPDATE incidents SET confidence = ?, extent = ?, detections = ?, last_seen = ?
+                      WHERE id = ? AND COALESCE(status, '') NOT IN ({closed})''',
+                  (confidence, json.dumps(extent), detections,
+                   datetime.datetime.fromtimestamp(last_seen).isoformat(), id, *CLOSED_STATUSES))
+        found = c.rowcount > 0
+        conn.commit()
+        conn.close()
+        return found
+
     def delete_incident(self, id):
         conn = sqlite3.connect(self.db_path)
         c = conn.cursor()
         c.execute("DELETE FROM incidents WHERE id = ?", (id,))
+        found = c.rowcount > 0
         conn.commit()
         conn.close()
+
+        if not found:
+            path = self._archived_path(id)
+            if path is not None:
+                conn = sqlite3.connect(path)
+                conn.execute("DELETE FROM incidents WHERE id = ?", (id,))
+                conn.commit()
+                conn.close()
+                conn = sqlite3.connect(self.db_path)
+                conn.execute("DELETE FROM archived_ids WHERE id = ?", (id,))
+                conn.commit()
+                conn.close()
         return True
 
-    def get_stats(self):
-        """Retorna estatísticas para o dashboard."""
-        incidents = self.get_all()
-        
-        today = datetime.datetime.now().date()
+    def get_stats(self, now=None):
+        """
+        Estatísticas do dashboard agregadas no SQL, sem carregar os incidentes.
+        Hoje/mês: banco quente + arquivo do mês corrente. Por status: banco
+        quente + contagem de cada arquivo mensal (em cache, ver _archive_query).
+        """
+        now = now or datetime.datetime.now()
+        today = now.date()
+        tomorrow = today + datetime.timedelta(days=1)
+        month = today.strftime("%Y-%m")
+        next_month = (today.replace(day=28) + datetime.timedelta(days=4)).strftime("%Y-%m")
+        day_range = (today.isoformat(), tomorrow.isoformat())
+        fire_sql = "SELECT COUNT(*) FROM incidents WHERE tag = 'FOGO' AND timestamp >= ? AND timestamp < ?"
+
         daily_fire = 0
         monthly_fire = 0
-        
-        for inc in incidents:
-            dt = datetime.datetime.fromisoformat(inc['timestamp']).date()
-            if inc['tag'] == 'FOGO':
-                if dt == today:
-                    daily_fire += 1
-                if dt.month == today.month and dt.year == today.year:
-                    monthly_fire += 1
-                    
+        hourly = [0] * 24
+        months = self._archive_months()
+        current = [self.db_path] + ([self._archive_path(month)] if month in months else [])
+        for path in current:
+            conn = self._read_only(path)
+            daily_fire += conn.execute(fire_sql, day_range).fetchone()[0]
+            monthly_fire += conn.execute(fire_sql, (month, next_month)).fetchone()[0]
+            for hour, count in conn.execute('''SELECT CAST(substr(timestamp, 12, 2) AS INTEGER), COUNT(*)
+                                               FROM incidents WHERE timestamp >= ? AND timestamp < ?
+                                               GROUP BY 1''', day_range):
+                if hour is not None and 0 <= hour < 24:
+                    hourly[hour] += count
+            conn.close()
+
+        conn = self._read_only(self.db_path)
+        status_counts = dict(conn.execute("SELECT status, COUNT(*) FROM incidents GROUP BY status").fetchall())
+        conn.close()
+        for archived in months:
+            for status, count in self._archive_query(self._archive_path(archived),
+                                                     "SELECT status, COUNT(*) FROM incidents GROUP BY status"):
+                status_counts[status] = status_counts.get(status, 0) + count
+
         return {
             "dailyFireCount": daily_fire,
             "monthlyFireCount": monthly_fire,
-            "total": len(incidents)
+            "total": sum(status_counts.values()),
+            "statusCounts": status_counts,
+            "hourly": hourly
         }
 
     def add_note(self, incident_id, author, content):
-        # Primeiro lê notas atuais
+        # Primeiro lê notas atuais (banco quente ou, se já arquivado, o arquivo do mês)
         conn = sqlite3.connect(self.db_path)
         conn.row_factory = sqlite3.Row
         c = conn.cursor()
-        
+
         c.execute("SELECT notes FROM incidents WHERE id = ?", (incident_id,))
         row = c.fetchone()
-        
+
         if not row:
             conn.close()
-            return None
+            path = self._archived_path(incident_id)
+            if path is None:
+                return None
+            conn = sqlite3.connect(path)
+            conn.row_factory = sqlite3.Row
+            c = conn.cursor()
+            row = c.execute("SELECT notes FROM incidents WHERE id = ?", (incident_id,)).fetchone()
+            if not row:
+                conn.close()
+                return None
             
         current_notes = json.loads(row['notes']) if row['notes'] else []
         
@@ -183,5 +525,157 @@ class IncidentManager:
         
         return new_note
 
+    # === Arquivo morto (partições mensais) ===
+    def _archive_path(self, month):
+        return os.path.join(self.archive_dir, f"incidents_{month.replace('-', '_')}.db")
+
+    def _archive_months(self):
+        """Meses arquivados ('AAAA-MM'), mais recentes primeiro."""
+        try:
+            names = os.listdir(self.archive_dir)
+        except FileNotFoundError:
+            return []
+        matches = (ARCHIVE_NAME.match(name) for name in names)
+        return sorted((f"{m.group(1)}-{m.group(2)}" for m in matches if m), reverse=True)
+
+    def _archived_path(self, id):
+        """Arquivo mensal que contém o incidente (None se não foi arquivado)."""
+        conn = sqlite3.connect(self.db_path)
+        row = conn.execute("SELECT month FROM archived_ids WHERE id = ?", (id,)).fetchone()
+        conn.close()
+        if row is None:
+            return None
+        path = self._archive_path(row[0])
+        return path if os.path.exists(path) else None
+
+    def _archive_query(self, path, sql, params=()):
+        """
+        Linhas de uma consulta num arquivo mensal, em cache até o arquivo mudar.
+        O arquivo morto quase não é escrito, então as contagens repetidas do
+        polling da listagem e do dashboard não releem o histórico.
+        """
+        st = os.stat(path)
+        key = (path, sql, tuple(params))
+        cached = self._archive_cache.get(key)
+        if cached is not None and cached[:2] == (st.st_mtime_ns, st.st_size):
+            return cached[2]
+        conn = self._read_only(path)
+        rows = [tuple(row) for row in conn.execute(sql, params)]
+        conn.close()
+        if len(self._archive_cache) >= ARCHIVE_CACHE_ENTRIES:
+            self._archive_cache.clear()
+        self._archive_cache[key] = (st.st_mtime_ns, st.st_size, rows)
+        return rows
+
+    def _ensure_archive(self, month):
+        path = self._archive_path(month)
+        if not os.path.exists(path):
+            os.makedirs(self.archive_dir, exist_ok=True)
+            conn = sqlite3.connect(path)
+            self._create_schema(conn.cursor())
+            conn.commit()
+            conn.close()
+        return path
+
+    def archive_incidents(self, now=None):
+        """
+        Move para o arquivo do mês (pelo timestamp) os incidentes encerrados há
+        mais de RESOLVED_GRACE_DAYS e todos os anteriores a ARCHIVE_AFTER_DAYS,
+        em lotes de ARCHIVE_BATCH. Retorna quantos foram movidos.
+        """
+        now = now or datetime.datetime.now()
+        aged_before = (now - datetime.timedelta(days=ARCHIVE_AFTER_DAYS)).isoformat()
+        resolved_before = (now - datetime.timedelta(days=RESOLVED_GRACE_DAYS)).isoformat()
+        moved = 0
+        with self.archive_lock:
+            conn = sqlite3.connect(self.db_path, isolation_level=None)
+            # REPLACE no arquivo dispara o trigger de DELETE do FTS da linha substituída
+            conn.execute("PRAGMA recursive_triggers = ON")
+            try:
+                columns = [row[1] for row in conn.execute("PRAGMA table_info(incidents)")]
+                closed = ", ".join("?" * len(CLOSED_STATUSES))
+                while True:
+                    rows = conn.execute(f'''SELECT id, substr(timestamp, 1, 7) FROM incidents
+                                            WHERE (timestamp < ? OR (status IN ({closed}) AND timestamp < ?))
+                                              AND timestamp GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]*'
+                                            ORDER BY timestamp LIMIT ?''',
+                                        (aged_before, *CLOSED_STATUSES, resolved_before, ARCHIVE_BATCH)).fetchall()
+                    if not rows:
+                        break
+                    by_month = {}
+                    for id, month in rows:
+                        by_month.setdefault(month, []).append(id)
+                    batch = sum(self._move_batch(conn, month, ids, columns) for month, ids in by_month.items())
+                    if batch == 0:
+                        break # Lote todo editado durante a cópia: fica para a próxima rodada
+                    moved += batch
+                    time.sleep(ARCHIVE_PAUSE)
+            finally:
+                conn.close()
+        if moved:
+            print(f"[DB] {moved} incidente(s) movido(s) para o arquivo morto.")
+        return moved
+
+    def _move_batch(self, conn, month, ids, columns):
+        """
+        Copia o lote para o arquivo do mês (o banco quente só é lido) e depois,
+        numa transação sobre os dois bancos, apaga do quente as linhas que
+        continuam idênticas à cópia e do arquivo as cópias das que foram
+        editadas no meio-tempo (ficam no quente até a próxima rodada). O lock de
+        escrita do banco quente dura só esse segundo passo, que também registra
+        os IDs movidos em archived_ids. Nenhuma ordem de
+        queda perde dados: no pior caso sobra uma cópia duplicada de linhas que
+        ainda atendem ao critério, e a próxima rodada a substitui e apaga.
+        """
+        path = self._ensure_archive(month)
+        marks = ", ".join("?" * len(ids))
+        col_list = ", ".join(columns)
+        unchanged = " AND ".join(f"a.{col} IS incidents.{col}" for col in columns)
+        conn.execute("ATTACH DATABASE ? AS arc", (path,))
+        try:
+            conn.execute("BEGIN")
+            conn.execute(f'''INSERT OR REPLACE INTO arc.incidents ({col_list})
+                             SELECT {col_list} FROM main.incidents WHERE id IN ({marks})''', ids)
+            conn.execute("COMMIT")
+
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(f'''INSERT OR REPLACE INTO main.archived_ids (id, month)
+                             SELECT id, ? FROM main.incidents WHERE id IN ({marks})
+                             AND EXISTS (SELECT 1 FROM arc.incidents AS a
+                                         WHERE a.id = incidents.id AND {unchanged})''',
+                         (month, *ids))
+            deleted = conn.execute(f'''DELETE FROM main.incidents WHERE id IN ({marks})
+                                       AND EXISTS (SELECT 1 FROM arc.incidents AS a
+                                                   WHERE a.id = incidents.id AND {unchanged})''',
+                                   ids).rowcount
+            # Editadas durante a cópia: continuam no quente, sem cópia velha no arquivo
+            conn.execute(f'''DELETE FROM arc.incidents WHERE id IN ({marks})
+                             AND id IN (SELECT id FROM main.incidents)''', ids)
+            conn.execute("COMMIT")
+            return deleted
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.execute("DETACH DATABASE arc")
+
+    def start_archiver(self, interval=ARCHIVE_INTERVAL):
+        """Compactação periódica em segundo plano (uma thread por processo)."""
+        with self.archive_lock:
+            if self.archiver is not None:
+                return
+            self.archiver = threading.Thread(target=self._archive_loop, args=(interval,),
+                                             daemon=True, name="incident-archiver")
+            self.archiver.start()
+
+    def _archive_loop(self, interval):
+        while True:
+            try:
+                self.archive_incidents()
+            except (sqlite3.Error, OSError) as e:
+                print(f"[DB] Falha ao arquivar incidentes ({e}). Nova tentativa em {interval:.0f}s.")
+            time.sleep(interval)
+
 # Singleton instance
 incident_manager = IncidentManager()
@@ -0,0 +1,160 @@
+"""
+Controlador adaptativo da inferência (realimentação sobre a latência).
+
+Mede a latência de detecção de cada keyframe com YOLO (captura do frame ->
+detecções prontas) em média móvel exponencial e a carga do sistema
+(loadavg / núcleos). Acima do SLO ou com a máquina saturada, desce um nível
+na escada de qualidade (keyframes mais espaçados, depois entrada menor);
+com folga, sobe de volta até a qualidade máxima. O número de threads do
+PyTorch acompanha a carga (menos threads com a máquina disputada).
+
+As decisões ficam registradas em metrics() (rota /api/inference/metrics).
+"""
+import os
+import threading
+import time
+from collections import deque
+
+try:
+    import torch
+except ImportError:
+    torch = None
+
+# === Configurações ===
+LATENCY_SLO = 0.25      # Segundos: captura -> detecções de um keyframe
+HEADROOM = 0.6          # Sobe de nível se a latência < HEADROOM * SLO
+LOAD_HIGH = 0.9         # loadavg(1 min) por núcleo: máquina saturada
+LOAD_LOW = 0.6          # Abaixo disso há CPU sobrando
+EMA_ALPHA = 0.2         # Peso da medição mais recente
+DECISION_INTERVAL = 5.0 # Segundos mínimos entre mudanças de nível (histerese)
+HISTORY = 50            # Decisões guardadas para as métricas
+
+# Escada de qualidade relativa ao nível 0 (KEYFRAME_INTERVAL/INFERENCE_SIZE do camera.py):
+# (multiplicador do intervalo de keyframes, fator da entrada do YOLO).
+# Primeiro espaça os keyframes (o tracker cobre os intermediários), depois reduz a entrada.
+QUALITY_STEPS = [
+    (1.0, 1.0),
+    (4 / 3, 1.0),
+    (2.0, 1.0),
+    (2.0, 0.8),
+    (8 / 3, 0.8),
+    (8 / 3, 0.6),
+]
+
+
+def quality_levels(keyframe_interval, input_size, steps=QUALITY_STEPS):
+    """
+    Níveis (keyframe a cada N frames, entrada (largura, altura)) a partir da
+    configuração base. Com 3 e 320x240: 3, 4, 6, 6@256x192, 8@256x192, 8@192x144.
+    """
+    width, height = input_size
+    levels = []
+    for interval_mult, size_mult in steps:
+        level = (max(1, round(keyframe_interval * interval_mult)),
+                 (max(32, int(round(width * size_mult))), max(32, int(round(height * size_mult)))))
+        if level not in levels:
+            levels.append(level)
+    return levels
+
+
+def _load_per_cpu():
+    try:
+        return os.getloadavg()[0] / (os.cpu_count() or 1)
+    except (AttributeError, OSError): # Windows
+        return None
+
+
+class InferenceController:
+    """Escolhe intervalo de keyframes, tamanho de entrada e threads para manter o SLO."""
+
+    def __init__(self, levels, slo=LATENCY_SLO, adapt_threads=True):
+        self.slo = slo
+        self.levels = levels
+        self.adapt_threads = adapt_threads # False: threads do PyTorch nunca são alteradas
+        self.level = 0
+        self.latency_ema = None
+        self.last_latency = None
+        self.load = None
+        self.passes = 0
+        self.last_decision = None
+        self.history = deque(maxlen=HISTORY)
+        self.counts = {"down": 0, "up": 0, "threads": 0}
+        self.lock = threading.Lock()
+        self.max_threads = torch.get_num_threads() if torch is not None else None
+        self.threads = self.max_threads
+
+    @property
+    def keyframe_interval(self):
+        return self.levels[self.level][0]
+
+    @property
+    def input_size(self):
+        return self.levels[self.level][1]
+
+    def record(self, latency, now=None):
+        """Registra a latência de um keyframe e, passado o intervalo mínimo, decide."""
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            self.passes += 1
+            self.last_latency = latency
+            self.latency_ema = latency if self.latency_ema is None else \
+                EMA_ALPHA * latency + (1 - EMA_ALPHA) * self.latency_ema
+            if self.last_decision is None:
+                self.last_decision = now
+            elif now - self.last_decision >= DECISION_INTERVAL:
+                self.last_decision = now
+                self._decide()
+
+    def _decide(self):
+        self.load = _load_per_cpu()
+        saturated = self.load is not None and self.load > LOAD_HIGH
+        over_slo = self.latency_ema > self.slo
+
+        if (over_slo or saturated) and self.level < len(self.levels) - 1:
+            self._set_level(self.level + 1, "latência acima do SLO" if over_slo else "carga alta")
+        elif self.latency_ema < HEADROOM * self.slo and (self.load is None or self.load < LOAD_LOW) \
+                and self.level > 0:
+            self._set_level(self.level - 1, "folga")
+
+        # Threads do PyTorch: menos com a máquina disputada, mais com CPU livre
+        if self.adapt_threads and self.threads is not None and self.load is not None:
+            if self.load > LOAD_HIGH and self.threads > 1:
+                self._set_threads(self.threads - 1)
+            elif self.load < LOAD_LOW and over_slo and self.threads < self.max_threads:
+                self._set_threads(self.threads + 1)
+
+    def _set_level(self, level, reason):
+        self.counts["down" if level > self.level else "up"] += 1
+        self.level = level
+        self._log(f"nível {level}: keyframe a cada {self.keyframe_interval}, "
+                  f"entrada {self.input_size[0]}x{self.input_size[1]}", reason)
+
+    def _set_threads(self, threads):
+        torch.set_num_threads(threads)
+        self.counts["threads"] += 1
+        self.threads = threads
+        self._log(f"threads do PyTorch: {threads}", "carga alta" if self.load > LOAD_HIGH else "CPU livre")
+
+    def _log(self, action, reason):
+        ema_ms = self.latency_ema * 1000
+        self.history.append({"time": time.time(), "action": action, "reason": reason,
+                             "latency_ms": round(ema_ms, 1),
+                             "load": round(self.load, 2) if self.load is not None else None})
+        print(f" [IA] {action} ({reason}, latência {ema_ms:.0f} ms)")
+
+    def metrics(self):
+        with self.lock:
+            return {
+                "level": self.level,
+                "max_level": len(self.levels) - 1,
+                "keyframe_interval": self.keyframe_interval,
+                "input_size": list(self.input_size),
+                "torch_threads": self.threads,
+                "slo_ms": round(self.slo * 1000, 1),
+                "latency_ema_ms": round(self.latency_ema * 1000, 1) if self.latency_ema is not None else None,
+                "last_latency_ms": round(self.last_latency * 1000, 1) if self.last_latency is not None else None,
+                "load_per_cpu": round(self.load, 2) if self.load is not None else None,
+                "passes": self.passes,
+                "changes": dict(self.counts),
+                "decisions": list(self.history),
+            }
@@ -0,0 +1,185 @@
+"""
+Lado central do modo agente (agent.py): aplica um lote recebido em /api/ingest.
+
+Detecções vão para a série temporal (detection_store) com o ID de câmera do
+site; eventos de incidente criam/atualizam linhas no incidents.db. O ID gerado
+na borda é curto (INC- + 6 hex) e só é único dentro do site, então no central
+ele é guardado com o site como prefixo ("obra-norte:INC-3F2A1B"). Reenvios do
+mesmo lote não duplicam nada.
+
+O lote inteiro é validado antes de qualquer escrita: um evento malformado
+rejeita o lote (HTTP 400) sem deixar detecções gravadas pela metade.
+"""
+import base64
+import binascii
+import datetime
+import math
+import os
+import re
+
+from detection_store import detection_store
+from incidents_manager import incident_manager
+
+SAFE_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$") # IDs usados em nomes de arquivo
+INT16 = (-32768, 32767) # Faixa das caixas na série temporal
+UINT16 = (0, 65535)     # Faixa do ID de câmera
+INT32 = (-2 ** 31, 2 ** 31 - 1)
+EPOCH = (0, 32503680000) # Segundos aceitos em ts/last_seen (até o ano 3000; seguro para fromtimestamp)
+MAX_TEXT = 2000          # Caracteres por campo de texto do incidente
+INCIDENT_TEXT_FIELDS = ("type", "tag", "priority", "address", "description", "status")
+
+
+def central_id(site, incident_id):
+    """ID do incidente no central: único entre sites."""
+    return f"{site}:{incident_id}"
+
+
+def apply_batch(payload, thumbnails_dir):
+    """Retorna contadores do que foi aplicado; ValueError para lote malformado."""
+    site, camera, frames, events = _validate(payload)
+
+    detection_store.start()
+    counts = {"detections": 0, "created": 0, "updated": 0, "thumbnails": 0}
+    for frame in frames:
+        detection_store.append(frame["detections"], ts=frame["ts"], camera=camera)
+        counts["detections"] += len(frame["detections"])
+
+    for event in events:
+        if event["event"] == "created":
+            inc = event["incident"]
+            incident_id = central_id(site, inc["id"])
+            location = inc.get("location")
+            created = incident_manager.create_incident(
+                type=inc.get("type", "Detecção"),
+                tag=inc.get("tag", "OUTRO"),
+                priority=inc.get("priority", "Alta"),
+                address=f"{inc.get('address') or ''} [{site}]",
+                description=inc.get("description", ""),
+                status=inc.get("status", "Novo"),
+                confidence=inc.get("confidence"),
+                extent=inc.get("extent"),
+                incident_id=incident_id,
+                timestamp=inc.get("timestamp"),
+                location=(location["lat"], location["lon"]) if location else None,
+            )
+            if created is None:
+                continue # Reenvio de um lote já aplicado
+            counts["created"] += 1
+            if event.get("thumbnail"):
+                filename = f"incident_{site}_{inc['id']}.jpg"
+                if _save_thumbnail(filename, event["thumbnail"], thumbnails_dir):
+                    incident_manager.add_note(incident_id, f"Agente {site}",
+                                              f"Miniatura da detecção: /assets/{filename}")
+                    counts["thumbnails"] += 1
+        else:
+            if incident_manager.touch_incident(central_id(site, event["id"]), event["confidence"],
+                                               event["extent"], event["detections"], event["last_seen"]):
+                counts["updated"] += 1
+    return counts
+
+
+def _validate(payload):
+    """Confere o lote inteiro; retorna (site, câmera, frames, eventos) ou levanta ValueError."""
+    if not isinstance(payload, dict):
+        raise ValueError("Lote não é um objeto JSON")
+    site = payload.get("site")
+    if not isinstance(site, str) or not SAFE_ID.match(site):
+        raise ValueError("site inválido")
+    camera = _int(payload.get("camera"), "camera", UINT16)
+    frames = _list(payload.get("detections", []), "detections")
+    events = _list(payload.get("events", []), "events")
+
+    for frame in frames:
+        if not isinstance(frame, dict):
+            raise ValueError("frame inválido")
+        _number(frame.get("ts"), "ts", EPOCH)
+        for det in _list(frame.get("detections"), "detections"):
+            if not isinstance(det, dict) or not isinstance(det.get("tag"), str):
+                raise ValueError("detecção inválida")
+            _number(det.get("conf"), "conf")
+            for value in _sized(det.get("box"), 4, "box"):
+                _int(value, "box", INT16)
+            for value in _sized(det.get("coords"), 2, "coords"):
+                _number(value, "coords")
+            if det.get("track_id") is not None:
+                _int(det["track_id"], "track_id", INT32)
+
+    for event in events:
+        kind = event.get("event") if isinstance(event, dict) else None
+        if kind == "created":
+            inc = event.get("incident")
+            if not isinstance(inc, dict) or not isinstance(inc.get("id"), str) or not SAFE_ID.match(inc["id"]):
+                raise ValueError("incidente sem ID válido")
+            for field in INCIDENT_TEXT_FIELDS:
+                if inc.get(field) is not None and (not isinstance(inc[field], str) or len(inc[field]) > MAX_TEXT):
+                    raise ValueError(f"{field} inválido")
+            if inc.get("confidence") is not None:
+                _number(inc["confidence"], "confidence")
+            if inc.get("extent") is not None:
+                for value in _sized(inc["extent"], 4, "extent"):
+                    _number(value, "extent")
+            location = inc.get("location")
+            if location:
+                if not isinstance(location, dict):
+                    raise ValueError("location inválida")
+                _number(location.get("lat"), "lat", (-90, 90))
+                _number(location.get("lon"), "lon", (-180, 180))
+            if inc.get("timestamp") is not None:
+                # O mês do timestamp escolhe o arquivo morto; precisa ser ISO válido
+                try:
+                    datetime.datetime.fromisoformat(inc["timestamp"])
+                except (TypeError, ValueError):
+                    raise ValueError("timestamp inválido")
+            if event.get("thumbnail") is not None and not isinstance(event["thumbnail"], str):
+                raise ValueError("thumbnail inválida")
+        elif kind == "updated":
+            if not isinstance(event.get("id"), str) or not SAFE_ID.match(event["id"]):
+                raise ValueError("evento sem ID válido")
+            if event.get("confidence") is not None:
+                _number(event["confidence"], "confidence")
+            for value in _sized(event.get("extent"), 4, "extent"):
+                _number(value, "extent")
+            _int(event.get("detections"), "detections", INT32)
+            _number(event.get("last_seen"), "last_seen", EPOCH)
+        else:
+            raise ValueError("evento desconhecido")
+    return site, camera, frames, events
+
+
+def _list(value, name):
+    if not isinstance(value, list):
+        raise ValueError(f"{name} deve ser uma lista")
+    return value
+
+
+def _sized(value, size, name):
+    if not isinstance(value, list) or len(value) != size:
+        raise ValueError(f"{name} deve ter {size} valores")
+    return value
+
+
+def _number(value, name, bounds=None):
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise ValueError(f"{name} inválido")
+    if bounds is not None and not bounds[0] <= value <= bounds[1]:
+        raise ValueError(f"{name} fora da faixa")
+    return value
+
+
+def _int(value, name, bounds):
+    if isinstance(value, bool) or not isinstance(value, int) or not bounds[0] <= value <= bounds[1]:
+        raise ValueError(f"{name} inválido")
+    return value
+
+
+def _save_thumbnail(filename, data, thumbnails_dir):
+    try:
+        jpeg = base64.b64decode(data, validate=True)
+    except (binascii.Error, ValueError):
+        return False
+    if not jpeg.startswith(b"\xff\xd8"):
+        return False
+    os.makedirs(thumbnails_dir, exist_ok=True)
+    with open(os.path.join(thumbnails_dir, filename), "wb") as f:
+        f.write(jpeg)
+    return True
@@ -0,0 +1,109 @@
+"""
+Camada de codec JPEG.
+
+Decodificação reduzida: o libjpeg consegue decodificar direto em 1/2, 1/4 ou
+1/8 da resolução (escala no domínio DCT), pulando a maior parte do IDCT e da
+conversão de cor. Para a inferência em 320x240, uma foto de 12 MP vira
+500x375 já na decodificação, em vez de 4000x3000 que seriam reduzidos logo
+em seguida.
+
+Codificação: TurboJPEG (PyTurboJPEG + libjpeg-turbo) com DCT rápida quando
+disponível; senão, cv2.imencode com os mesmos parâmetros.
+"""
+import cv2
+import numpy as np
+
+# === Configurações ===
+USE_TURBOJPEG = True
+STREAM_QUALITY = 60
+
+REDUCED_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+# Marcadores SOFn (dimensões da imagem); C4, C8 e CC são outras tabelas
+_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+_turbo = None
+if USE_TURBOJPEG:
+    try:
+        from turbojpeg import TurboJPEG, TJPF_BGR, TJSAMP_420, TJFLAG_FASTDCT
+        _turbo = TurboJPEG()
+    except Exception: # Pacote ou libturbojpeg ausentes
+        _turbo = None
+
+
+def turbo_available():
+    return _turbo is not None
+
+
+def jpeg_dimensions(data):
+    """(largura, altura) lidas do cabeçalho JPEG, sem decodificar; None se não for JPEG."""
+    if data[:2] != b"\xff\xd8":
+        return None
+    i, n = 2, len(data)
+    while i + 9 <= n:
+        if data[i] != 0xFF:
+            i += 1
+            continue
+        marker = data[i + 1]
+        if marker == 0xFF: # Byte de preenchimento
+            i += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8: # Marcadores sem tamanho
+            i += 2
+            continue
+        if marker in _SOF_MARKERS:
+            height = int.from_bytes(data[i + 5:i + 7], "big")
+            width = int.from_bytes(data[i + 7:i + 9], "big")
+            return width, height
+        if marker == 0xDA: # Início dos dados sem SOF: arquivo inválido
+            return None
+        i += 2 + int.from_bytes(data[i + 2:i + 4], "big")
+    return None
+
+
+def reduced_scale(size, target):
+    """
+    Maior fator (8, 4, 2) que ainda deixa a imagem >= target nos dois lados.
+    Compara lado maior com lado maior, pois a orientação EXIF pode girar a foto.
+    """
+    long_side, short_side = max(size), min(size)
+    target_long, target_short = max(target), min(target)
+    for scale in (8, 4, 2):
+        if long_side // scale >= target_long and short_side // scale >= target_short:
+            return scale
+    return 1
+
+
+def decode(data, target=None):
+    """
+    Decodifica bytes de imagem em BGR. Com target=(w, h) e JPEG grande, usa a
+    decodificação reduzida. Retorna (frame, escala); coordenadas no frame
+    multiplicadas pela escala voltam à resolução original. frame é None se inválido.
+    """
+    scale = 1
+    if target is not None:
+        size = jpeg_dimensions(data)
+        if size is not None:
+            scale = reduced_scale(size, target)
+    frame = cv2.imdecode(np.frombuffer(data, np.uint8), REDUCED_FLAGS[scale])
+    return frame, scale
+
+
+class JpegEncoder:
+    """Codificador com parâmetros fixos (TurboJPEG se disponível, senão OpenCV)."""
+
+    def __init__(self, quality=STREAM_QUALITY):
+        self.quality = quality
+        self.params = [int(cv2.IMWRITE_JPEG_QUALITY), quality]
+
+    def encode(self, frame):
+        if _turbo is not None:
+            return _turbo.encode(frame, quality=self.quality, pixel_format=TJPF_BGR,
+                                 jpeg_subsample=TJSAMP_420, flags=TJFLAG_FASTDCT)
+        ok, jpeg = cv2.imencode(".jpg", frame, self.params)
+        return jpeg.tobytes() if ok else None
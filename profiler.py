@@ -0,0 +1,124 @@
+"""
+Profiler por amostragem para diagnóstico em produção (sem ferramentas externas).
+
+Enquanto roda, uma thread lê as pilhas de todas as outras threads via
+sys._current_frames() a cada intervalo e conta pilhas idênticas. Fora disso não
+há nenhum hook instalado, então o custo com o profiler parado é zero.
+
+A saída "collapsed" (uma linha "thread;f1;f2;...;folha N" por pilha) é aceita
+por flamegraph.pl, speedscope e inferno. O tempo de CPU de cada thread vem do
+relógio por thread do SO (pthread_getcpuclockid), quando disponível.
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+# === Configurações ===
+DEFAULT_INTERVAL = 0.01 # 100 amostras/s
+MIN_INTERVAL = 0.001
+MAX_DURATION = 60.0     # Segundos
+
+
+def _thread_cpu(ident):
+    """Segundos de CPU da thread (None se o SO não expõe o relógio por thread)."""
+    try:
+        return time.clock_gettime(time.pthread_getcpuclockid(ident))
+    except (AttributeError, OSError):
+        return None
+
+
+def _frame_label(frame, lines):
+    code = frame.f_code
+    line = frame.f_lineno if lines else code.co_firstlineno
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{line})"
+
+
+def _stack(frame, lines):
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame, lines))
+        frame = frame.f_back
+    labels.reverse() # Raiz primeiro, como no formato collapsed
+    return ";".join(labels)
+
+
+class SamplingProfiler:
+    """Um perfil por vez; chamadas concorrentes recebem RuntimeError."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self.lock.locked()
+
+    def profile(self, duration, interval=DEFAULT_INTERVAL, lines=False):
+        duration = max(0.0, min(float(duration), MAX_DURATION))
+        interval = max(MIN_INTERVAL, float(interval))
+        if not self.lock.acquire(blocking=False):
+            raise RuntimeError("Profiler já está em execução")
+        try:
+            return self._sample(duration, interval, lines)
+        finally:
+            self.lock.release()
+
+    def _sample(self, duration, interval, lines):
+        me = threading.get_ident()
+        threads = {t.ident: t for t in threading.enumerate()}
+        cpu_start = {ident: _thread_cpu(ident) for ident in threads}
+        stacks = Counter()
+        per_thread = Counter()
+        samples = 0
+
+        start = time.perf_counter()
+        deadline = start + duration
+        while True:
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                thread = threads.get(ident)
+                if thread is None:
+                    # Thread criada durante o perfil (ex: envio de alerta)
+                    thread = threads[ident] = next((t for t in threading.enumerate() if t.ident == ident), None)
+                    cpu_start[ident] = _thread_cpu(ident)
+                name = thread.name if thread is not None else f"thread-{ident}"
+                stacks[f"{name};{_stack(frame, lines)}"] += 1
+                per_thread[ident] += 1
+            samples += 1
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            time.sleep(min(interval, deadline - now))
+        elapsed = time.perf_counter() - start
+
+        report = []
+        for ident, thread in threads.items():
+            if ident == me:
+                continue
+            cpu = None
+            # Relógio de thread encerrada não é válido
+            end_cpu = _thread_cpu(ident) if thread is not None and thread.is_alive() else None
+            if end_cpu is not None and cpu_start.get(ident) is not None:
+                cpu = end_cpu - cpu_start[ident]
+            report.append({
+                "name": thread.name if thread is not None else f"thread-{ident}",
+                "ident": ident,
+                "native_id": getattr(thread, "native_id", None),
+                "alive": thread.is_alive() if thread is not None else False,
+                "samples": per_thread[ident],
+                "cpu_seconds": round(cpu, 4) if cpu is not None else None,
+                "cpu_pct": round(100.0 * cpu / elapsed, 1) if cpu is not None and elapsed else None,
+            })
+        report.sort(key=lambda t: (t["cpu_seconds"] or 0, t["samples"]), reverse=True)
+        return {"duration": round(elapsed, 3), "interval": interval, "samples": samples,
+                "threads": report, "stacks": stacks}
+
+
+def collapsed(stacks):
+    """Formato collapsed/folded (flamegraph.pl, speedscope)."""
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+profiler = SamplingProfiler()
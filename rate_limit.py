@@ -0,0 +1,124 @@
+"""
+Rate limiting por token bucket, compartilhado entre workers (gunicorn) via SQLite.
+
+Cada (rota, cliente) é uma linha com o saldo de fichas e o instante da última
+atualização; a recarga é calculada na própria atualização (O(1), sem lista de
+timestamps). Buckets ociosos até encher de novo equivalem a "sem bucket" e são
+apagados periodicamente.
+
+Uso:
+    @app.route('/api/detect', methods=['POST'])
+    @rate_limit(30, per=60, burst=10, scope='detect')
+    def detect(): ...
+"""
+import functools
+import os
+import sqlite3
+import threading
+import time
+
+from flask import jsonify, request
+
+# === Configurações ===
+RATE_LIMIT_DB = os.environ.get("RATE_LIMIT_DB", "ratelimit.db")
+EVICT_INTERVAL = 60.0 # Segundos entre limpezas de buckets ociosos
+BUSY_TIMEOUT_MS = 200 # Espera máxima pelo lock do SQLite antes de liberar a requisição
+
+
+class RateLimiter:
+    """Token buckets persistidos em SQLite (um arquivo para todos os processos)."""
+
+    def __init__(self, db_path=RATE_LIMIT_DB):
+        self.db_path = db_path
+        self.local = threading.local()
+        self.last_evict = 0.0
+        with self._conn() as c:
+            c.execute("PRAGMA journal_mode=WAL")
+            c.execute("""CREATE TABLE IF NOT EXISTS buckets (
+                            key TEXT PRIMARY KEY,
+                            tokens REAL NOT NULL,
+                            updated REAL NOT NULL,
+                            idle_at REAL NOT NULL
+                         ) WITHOUT ROWID""")
+
+    def _conn(self):
+        """Uma conexão por thread (o Flask atende em várias threads)."""
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT_MS / 1000.0, isolation_level=None)
+            conn.execute("PRAGMA synchronous=OFF") # Perder saldos num crash é aceitável
+            self.local.conn = conn
+        return conn
+
+    def hit(self, key, rate, burst, now=None):
+        """
+        Consome uma ficha do bucket `key` (recarga `rate` fichas/s, capacidade
+        `burst`). Retorna (permitido, segundos até a próxima ficha).
+        """
+        now = time.time() if now is None else now
+        conn = self._conn()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+                tokens = burst if row is None else min(burst, row[0] + max(0.0, now - row[1]) * rate)
+                allowed = tokens >= 1.0
+                if allowed:
+                    tokens -= 1.0
+                # Ocioso até encher de novo = igual a não existir
+                conn.execute("INSERT OR REPLACE INTO buckets (key, tokens, updated, idle_at) VALUES (?, ?, ?, ?)",
+                             (key, tokens, now, now + (burst - tokens) / rate))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        except sqlite3.Error as e:
+            # Banco travado/indisponível: não derruba a API por causa do limitador
+            print(f"[RATE LIMIT] Falha no SQLite ({e}); requisição liberada.")
+            return True, 0.0
+
+        if now - self.last_evict >= EVICT_INTERVAL:
+            self.last_evict = now
+            self.evict(now)
+        return allowed, 0.0 if allowed else (1.0 - tokens) / rate
+
+    def evict(self, now=None):
+        """Remove buckets que já estariam cheios (sem efeito no limite)."""
+        now = time.time() if now is None else now
+        try:
+            return self._conn().execute("DELETE FROM buckets WHERE idle_at < ?", (now,)).rowcount
+        except sqlite3.Error:
+            return 0
+
+    def reset(self, key):
+        self._conn().execute("DELETE FROM buckets WHERE key = ?", (key,))
+
+
+limiter = RateLimiter()
+
+
+def rate_limit(rate, per=60.0, burst=None, scope=None, key_func=None,
+               message="Muitas requisições. Tente novamente em instantes."):
+    """
+    Decorator de rota: `rate` requisições a cada `per` segundos por cliente,
+    com rajada de até `burst` (padrão: `rate`). `scope` separa os buckets por
+    rota; `key_func` troca a identificação do cliente (padrão: IP).
+    """
+    burst = rate if burst is None else burst
+    per_second = rate / float(per)
+
+    def decorator(view):
+        bucket_scope = scope or view.__name__
+
+        @functools.wraps(view)
+        def wrapped(*args, **kwargs):
+            client = key_func() if key_func else request.remote_addr
+            allowed, retry_after = limiter.hit(f"{bucket_scope}:{client}", per_second, burst)
+            if not allowed:
+                response = jsonify({"success": False, "message": message})
+                response.status_code = 429
+                response.headers["Retry-After"] = str(max(1, int(retry_after + 0.999)))
+                return response
+            return view(*args, **kwargs)
+        return wrapped
+    return decorator
@@ -0,0 +1,177 @@
+"""
+Servidor de streaming assíncrono (aiohttp) para muitos espectadores.
+
+Um único event loop atende todos os clientes MJPEG (/video_feed) e o fluxo de
+detecções (/events, Server-Sent Events). Cada frame é codificado UMA vez por
+um produtor e repassado a todos os clientes; cliente lento apenas pula frames.
+
+Uso:
+    python stream_server.py                # stream na porta 5001 + API Flask na 5000
+    python stream_server.py --no-api       # só o stream (API rodando em outro lugar)
+
+Com a API no mesmo processo, a câmera (singleton VideoCamera) é compartilhada.
+Defina STREAM_PORT=5001 para o /video_feed do Flask redirecionar para cá.
+"""
+import argparse
+import asyncio
+import json
+import os
+import threading
+import time
+
+from aiohttp import web
+
+from camera import VideoCamera
+
+STREAM_FPS = 15       # Frames/s codificados para o stream
+EVENTS_INTERVAL = 0.5 # Intervalo de verificação das detecções (SSE)
+BOUNDARY = b"--frame\r\nContent-Type: image/jpeg\r\n\r\n"
+
+
+class FrameBroadcaster:
+    """Produz o JPEG mais recente e notifica todos os clientes conectados."""
+
+    def __init__(self, camera, fps=STREAM_FPS):
+        self.camera = camera
+        self.interval = 1.0 / fps
+        self.cond = asyncio.Condition()
+        self.has_clients = asyncio.Event()
+        self.clients = 0
+        self.seq = 0
+        self.jpeg = None
+        self.stats = {"frames": 0, "encode_ms": 0.0}
+
+    def subscribe(self):
+        self.clients += 1
+        self.has_clients.set()
+
+    def unsubscribe(self):
+        self.clients -= 1
+        if self.clients <= 0:
+            self.clients = 0
+            self.has_clients.clear()
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            # Sem espectadores, não codifica nada
+            await self.has_clients.wait()
+            start = loop.time()
+            jpeg = await loop.run_in_executor(None, self.camera.get_frame)
+            if jpeg is not None and jpeg is not self.jpeg: # Mesmo JPEG em cache: nada novo
+                self.stats["frames"] += 1
+                self.stats["encode_ms"] = round((loop.time() - start) * 1000, 2)
+                async with self.cond:
+                    self.seq += 1
+                    self.jpeg = jpeg
+                    self.cond.notify_all()
+            await asyncio.sleep(max(0.0, self.interval - (loop.time() - start)))
+
+    async def next_frame(self, last_seq):
+        async with self.cond:
+            await self.cond.wait_for(lambda: self.seq > last_seq)
+            return self.seq, self.jpeg
+
+
+def boxes_snapshot(camera):
+    """Detecções atuais em formato JSON (mesma tupla de VideoCamera.latest_boxes)."""
+    with camera.box_lock:
+        boxes = list(camera.latest_boxes)
+    return [{"box": [x1, y1, x2, y2], "tag": tag, "conf": round(conf, 3),
+             "coords": [rx, ry], "track_id": track_id}
+            for (x1, y1, x2, y2, tag, color, conf, rx, ry, track_id) in boxes]
+
+
+async def video_feed(request):
+    broadcaster = request.app["broadcaster"]
+    resp = web.StreamResponse(headers={
+        "Content-Type": "multipart/x-mixed-replace; boundary=frame",
+        "Cache-Control": "no-cache, private",
+    })
+    await resp.prepare(request)
+    broadcaster.subscribe()
+    seq = 0
+    try:
+        while True:
+            seq, jpeg = await broadcaster.next_frame(seq)
+            await resp.write(BOUNDARY + jpeg + b"\r\n")
+    except ConnectionResetError:
+        pass
+    finally:
+        broadcaster.unsubscribe()
+    return resp
+
+
+async def events(request):
+    camera = request.app["camera"]
+    resp = web.StreamResponse(headers={
+        "Content-Type": "text/event-stream",
+        "Cache-Control": "no-cache",
+        "Access-Control-Allow-Origin": "*", # Dashboard servido pela API (outra porta)
+    })
+    await resp.prepare(request)
+    last = None
+    try:
+        while True:
+            detections = boxes_snapshot(camera)
+            if detections != last:
+                last = detections
+                payload = json.dumps({"timestamp": time.time(), "detections": detections})
+                await resp.write(f"data: {payload}\n\n".encode("utf-8"))
+            await asyncio.sleep(EVENTS_INTERVAL)
+    except ConnectionResetError:
+        pass
+    return resp
+
+
+async def status(request):
+    broadcaster = request.app["broadcaster"]
+    return web.json_response({"clients": broadcaster.clients, "seq": broadcaster.seq, **broadcaster.stats})
+
+
+async def _start_broadcaster(app):
+    app["broadcaster"] = FrameBroadcaster(app["camera"], app["fps"])
+    app["broadcaster_task"] = asyncio.create_task(app["broadcaster"].run())
+
+
+async def _stop_broadcaster(app):
+    app["broadcaster_task"].cancel()
+
+
+def create_app(camera=None, fps=STREAM_FPS):
+    app = web.Application()
+    app["camera"] = camera or VideoCamera()
+    app["fps"] = fps
+    app.on_startup.append(_start_broadcaster)
+    app.on_cleanup.append(_stop_broadcaster)
+    app.router.add_get("/video_feed", video_feed)
+    app.router.add_get("/events", events)
+    app.router.add_get("/stream/status", status)
+    return app
+
+
+def _run_api(port, stream_port):
+    """API Flask (threads do werkzeug) no mesmo processo, compartilhando a câmera."""
+    os.environ.setdefault("STREAM_PORT", str(stream_port)) # /video_feed do Flask redireciona para cá
+    from app import app as flask_app
+    flask_app.run(host='0.0.0.0', port=port, debug=False, threaded=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=5001)
+    parser.add_argument("--fps", type=int, default=STREAM_FPS)
+    parser.add_argument("--api-port", type=int, default=5000)
+    parser.add_argument("--no-api", action="store_true", help="Não sobe a API Flask neste processo")
+    args = parser.parse_args()
+
+    if not args.no_api:
+        threading.Thread(target=_run_api, args=(args.api_port, args.port), daemon=True, name="flask-api").start()
+        print(f"API Flask: http://localhost:{args.api_port}")
+    print(f"Stream assíncrono: http://localhost:{args.port}/video_feed")
+    web.run_app(create_app(fps=args.fps), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
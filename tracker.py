@@ -0,0 +1,146 @@
+import itertools
+import numpy as np
+
+# === Configurações ===
+IOU_THRESHOLD = 0.3 # IoU mínimo para associar detecção a uma track
+MAX_AGE = 2         # Keyframes consecutivos sem detecção até a track ser descartada
+
+
+def iou_matrix(boxes_a, boxes_b):
+    """IoU entre todas as caixas de A (N,4) e B (M,4) no formato x1,y1,x2,y2."""
+    a = np.asarray(boxes_a, dtype=float).reshape(-1, 4)
+    b = np.asarray(boxes_b, dtype=float).reshape(-1, 4)
+    ix1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    iy1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    ix2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    iy2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(ix2 - ix1, 0, None) * np.clip(iy2 - iy1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-9), 0.0)
+
+
+class Track:
+    """
+    Track de uma detecção com filtro de Kalman de velocidade constante.
+
+    Estado: [cx, cy, w, h, vx, vy, vw, vh], com velocidades em pixels/frame.
+    Entre keyframes a caixa é propagada só pela predição (custo desprezível).
+    """
+
+    _F = np.eye(8)
+    _F[:4, 4:] = np.eye(4)
+    _H = np.eye(4, 8)
+    _Q = np.diag([1.0, 1.0, 1.0, 1.0, 0.05, 0.05, 0.05, 0.05])
+    _R = np.diag([4.0, 4.0, 16.0, 16.0])
+
+    def __init__(self, track_id, det):
+        self.id = track_id
+        self.x = np.zeros(8)
+        self.x[:4] = self._to_z(det["box"])
+        self.P = np.diag([10.0, 10.0, 10.0, 10.0, 1000.0, 1000.0, 1000.0, 1000.0])
+        self.misses = 0
+        self.hits = 1
+        self._set_det(det)
+
+    @staticmethod
+    def _to_z(box):
+        x1, y1, x2, y2 = box
+        return np.array([(x1 + x2) / 2.0, (y1 + y2) / 2.0, float(x2 - x1), float(y2 - y1)])
+
+    def _set_det(self, det):
+        self.tag = det["tag"]
+        self.color = det["color"]
+        self.conf = det["conf"]
+        self.coords = det["coords"]
+        self.label = det.get("label", "")
+
+    def predict(self):
+        self.x = self._F @ self.x
+        self.P = self._F @ self.P @ self._F.T + self._Q
+        self.x[2:4] = np.maximum(self.x[2:4], 1.0)
+
+    def update(self, det):
+        z = self._to_z(det["box"])
+        y = z - self._H @ self.x
+        S = self._H @ self.P @ self._H.T + self._R
+        K = self.P @ self._H.T @ np.linalg.inv(S)
+        self.x = self.x + K @ y
+        self.P = (np.eye(8) - K @ self._H) @ self.P
+        self.misses = 0
+        self.hits += 1
+        self._set_det(det)
+
+    @property
+    def box(self):
+        cx, cy, w, h = self.x[:4]
+        return [int(cx - w / 2), int(cy - h / 2), int(cx + w / 2), int(cy + h / 2)]
+
+    def to_detection(self):
+        """Mesmo formato de VideoCamera.process_frame, com o ID estável da track."""
+        return {
+            "box": self.box,
+            "tag": self.tag,
+            "color": self.color,
+            "conf": self.conf,
+            "coords": self.coords,
+            "label": self.label,
+            "track_id": self.id
+        }
+
+
+class Tracker:
+    """Rastreador multi-objeto estilo SORT (Kalman + associação gulosa por IoU)."""
+
+    def __init__(self, iou_threshold=IOU_THRESHOLD, max_age=MAX_AGE):
+        self.iou_threshold = iou_threshold
+        self.max_age = max_age
+        self.tracks = []
+        self._ids = itertools.count(1)
+
+    def predict(self):
+        """Avança todas as tracks um frame (usado nos frames sem inferência)."""
+        for t in self.tracks:
+            t.predict()
+        return [t.to_detection() for t in self.tracks]
+
+    def update(self, detections):
+        """
+        Associa as detecções do keyframe às tracks existentes.
+        Retorna as detecções do keyframe já com 'track_id'.
+        """
+        for t in self.tracks:
+            t.predict()
+
+        matched_tracks = set()
+        matched_dets = {}
+        if self.tracks and detections:
+            ious = iou_matrix([t.box for t in self.tracks], [d["box"] for d in detections])
+            # Associação gulosa: pares de maior IoU primeiro, mesma classe apenas
+            for ti, di in zip(*np.unravel_index(np.argsort(-ious, axis=None), ious.shape)):
+                if ious[ti, di] < self.iou_threshold:
+                    break
+                if ti in matched_tracks or di in matched_dets:
+                    continue
+                if self.tracks[ti].tag != detections[di]["tag"]:
+                    continue
+                matched_tracks.add(ti)
+                matched_dets[di] = self.tracks[ti]
+
+        for ti, t in enumerate(self.tracks):
+            if ti not in matched_tracks:
+                t.misses += 1
+
+        results = []
+        for di, det in enumerate(detections):
+            track = matched_dets.get(di)
+            if track is None:
+                track = Track(next(self._ids), det)
+                self.tracks.append(track)
+            else:
+                track.update(det)
+            results.append(dict(det, track_id=track.id))
+
+        self.tracks = [t for t in self.tracks if t.misses <= self.max_age]
+        return results